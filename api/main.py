@@ -1,16 +1,21 @@
 import sys
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import asyncio
 import os
+import time
 from pathlib import Path
-from typing import Optional, List
-from datetime import datetime, date
+from typing import Optional, List, Dict, Any, Callable
+from datetime import datetime, date, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from contextlib import asynccontextmanager
 from loguru import logger
-from db import Database
+import orjson
+from db import Database, AsyncDatabase
 
 # Configure logger
 logger.remove()  # Remove default handler
@@ -26,32 +31,43 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 # Import all the necessary modules
 from config import *
-from rss_feed import fetch_rss_feed
-from article_extraction import extract_articles
-from summarization import summarize_text
-from text_to_speech import convert_to_audio, fetch_elevenlabs_voices, fetch_neets_voices
-from utils import create_output_folder, sanitize_filename, filter_articles_by_date
+from rss_feed import fetch_rss_feed, save_feed_states
+from text_to_speech import fetch_elevenlabs_voices, fetch_neets_voices
+from utils import create_output_folder
+from pipeline import build_article_pipeline, run_jobs
+from summarization import SummaryCache, SummarizationEngine
+from cache import AsyncTTLCache
+from http_cache import Validators, EncodedResponse, ResponseSnapshots, json_response
+from audio_store import collect_garbage
+from scheduler import ProcessingScheduler
+from rate_limit import limiter_status
+from metrics import HTTP_REQUEST_SECONDS, render as render_metrics
+from events import event_bus
+from http_client import init_http_client, close_http_client
+from article_extraction import init_parse_pool, shutdown_parse_pool
 from models import Article, Summary
 
-# Global state
-processing_task = None
-is_processing_paused = False
-
-# Initialize database
-db = Database()
+# Initialize database; handlers await its calls, which run on the database threads
+db = AsyncDatabase(Database())
+summary_cache = SummaryCache(db)
+summarizer = SummarizationEngine(cache=summary_cache)
+# provider voice lists, so opening the settings screen doesn't call the provider every time
+voice_cache = AsyncTTLCache("voices", VOICE_CACHE_TTL, VOICE_CACHE_STALE_TTL)
+# the full /summaries and /articles bodies, rebuilt only when the library version changes
+library_snapshots = ResponseSnapshots()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup - don't automatically start processing
+    # Startup - the first scheduled run happens one processInterval after startup
+    await init_http_client()
+    init_parse_pool()
+    scheduler.start()
     yield
     # Shutdown
-    global processing_task
-    if processing_task:
-        processing_task.cancel()
-        try:
-            await processing_task
-        except asyncio.CancelledError:
-            pass
+    await scheduler.stop()
+    await close_http_client()
+    shutdown_parse_pool()
+    db.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -64,6 +80,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress other large responses; the read endpoints send pre-compressed bodies (Content-Encoding
+# already set, so these pass through), and event streams and audio are excluded by default
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
+# routes whose request latency is recorded, labelled by prefix to keep the label set small
+TIMED_ROUTES = ("/summaries", "/articles", "/audio")
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    route = next((prefix for prefix in TIMED_ROUTES if request.url.path.startswith(prefix)), None)
+    if route is None:
+        return await call_next(request)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(route, request.method, str(status)).observe(time.perf_counter() - start)
+
 # Mount static files
 app.mount("/audio", StaticFiles(directory=OUTPUT_FOLDER), name="audio")
 
@@ -78,30 +115,32 @@ class Settings(BaseModel):
     processInterval: int = 300
 
 # Modify the settings initialization
-def load_current_settings():
+def load_current_settings() -> Dict[str, Any]:
     try:
         # Get settings from database, ensuring defaults exist
-        settings = db.ensure_default_settings()
+        db.sync.ensure_default_settings()
+        settings = db.sync.get_settings()
         if settings:
-            return Settings(**settings)
+            return settings
     except Exception as e:
         logger.error(f"Error loading settings: {e}")
-        # Return default settings if loading fails
-        return Settings(
-            ttsProvider=DEFAULT_TTS_PROVIDER,
-            voice=DEFAULT_NEETS_VOICE if DEFAULT_TTS_PROVIDER == "neets" else DEFAULT_ELEVENLABS_VOICE,
-            neetModel=DEFAULT_NEETS_MODEL,
-            summarizerModel=SUMMARIZER_MODEL,
-            rssFeeds=RSS_FEEDS,
-            autoPlay=False,
-            processInterval=300
-        )
+    # Return default settings if loading fails
+    return Settings(
+        ttsProvider=DEFAULT_TTS_PROVIDER,
+        voice=DEFAULT_NEETS_VOICE if DEFAULT_TTS_PROVIDER == "neets" else DEFAULT_ELEVENLABS_VOICE,
+        neetModel=DEFAULT_NEETS_MODEL,
+        summarizerModel=SUMMARIZER_MODEL,
+        rssFeeds=RSS_FEEDS,
+        autoPlay=False,
+        processInterval=300
+    ).dict()
 
-# Initialize settings from database or defaults
+# In-memory snapshot of the settings, read by every run and GET /settings.
+# POST /settings is the only writer and updates it in place.
 current_settings = load_current_settings()
 
 async def process_articles():
-    """Process articles from RSS feeds."""
+    """Process articles from RSS feeds; returns the number of articles processed, failed and skipped."""
     try:
         logger.info("Starting article processing")
         
@@ -109,88 +148,65 @@ async def process_articles():
         create_output_folder(OUTPUT_FOLDER)
         logger.info(f"Ensuring output folder exists: {OUTPUT_FOLDER}")
 
-        # Load current settings
-        settings = db.get_settings()
+        # Load current settings; a copy, so a settings change mid-run doesn't mix old and new values
+        settings = dict(current_settings)
         
         # Use loaded settings
         tts_provider = settings.get('ttsProvider', DEFAULT_TTS_PROVIDER)
         voice_id = settings.get('voice', DEFAULT_NEETS_VOICE if tts_provider == "neets" else DEFAULT_ELEVENLABS_VOICE)
         model = settings.get('neetModel', DEFAULT_NEETS_MODEL) if tts_provider == "neets" else None
         rss_feeds = settings.get('rssFeeds', RSS_FEEDS)
+        summarizer_model = settings.get('summarizerModel', SUMMARIZER_MODEL)
         
         logger.info(f"Using TTS Provider: {tts_provider}, Voice: {voice_id}, Model: {model}")
         logger.info(f"Processing RSS feeds: {rss_feeds}")
 
-        # Fetch new articles
+        # Fetch new articles and queue a job for each of them
         logger.info("Fetching articles from RSS feeds...")
-        urls = await fetch_rss_feed(rss_feeds)
-        existing_articles = db.get_articles()
-        new_urls = [url for url in urls if url not in existing_articles]
-        logger.info(f"Found {len(urls)} total articles, {len(new_urls)} new articles to process")
-        
-        if new_urls:
-            # Extract new articles
-            logger.info("Extracting content from new articles...")
-            new_articles = await extract_articles(new_urls)
-            logger.info(f"Successfully extracted {len(new_articles)} articles")
-            
-            # Process each article
-            for article in new_articles:
-                logger.info(f"Processing article: {article.title}")
-                
-                # Convert article to dictionary
-                article_dict = {
-                    'url': article.url,
-                    'title': article.title,
-                    'content': article.content,
-                    'publish_date': article.publish_date.isoformat() if article.publish_date else None
-                }
-                
-                try:
-                    # Save article to database
-                    db.save_article(article_dict)
-                    
-                    # Generate summary
-                    logger.info(f"Generating summary for: {article.title}")
-                    summary = await summarize_text(article.content)
-                    
-                    # Convert to audio using current settings
-                    audio_filename = sanitize_filename(f"{article.title}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3")
-                    audio_path = os.path.join(OUTPUT_FOLDER, audio_filename)
-                    logger.info(f"Converting summary to audio: {audio_filename}")
-                    
-                    await convert_to_audio(
-                        text=summary,
-                        output_file_path=audio_path,
-                        provider=tts_provider,
-                        voice_id=voice_id,
-                        model=model
-                    )
-                    
-                    # Save summary to database
-                    db.save_summary(article.url, {
-                        'summary': summary,
-                        'audio_path': f"/audio/{audio_filename}"
-                    })
-                    
-                    logger.info(f"Completed processing: {article.title}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing article {article.title}: {str(e)}")
-                    continue
-            
-            logger.info("Article processing completed successfully")
-        else:
-            logger.info("No new articles to process")
+        urls, feed_states = await fetch_rss_feed(rss_feeds, db)
+        new_urls = await db.filter_new_urls(urls)
+        queued = await db.enqueue_jobs(new_urls)
+        # only now that the links are queued may the feeds count as read
+        await save_feed_states(db, feed_states)
+        logger.info(f"Found {len(urls)} total articles, {queued} new articles to process")
+
+        # Run new, retried and interrupted jobs through the extract -> summarize -> narrate pipeline
+        pipeline = build_article_pipeline(
+            db, tts_provider, voice_id, model,
+            summarizer_model=summarizer_model,
+            summarizer=summarizer
+        )
+        result = await run_jobs(db, pipeline)
+        logger.info(
+            f"Article processing completed: {len(result.completed)} processed, "
+            f"{len(result.failed)} failed, {len(result.skipped)} skipped"
+        )
+
+        await summary_cache.evict()
+        await db.run(collect_garbage, db.sync)
+        return {
+            'processed': len(result.completed),
+            'failed': len(result.failed),
+            'skipped': len(result.skipped)
+        }
             
     except Exception as e:
         logger.error(f"Error during article processing: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise
+
+def get_process_interval() -> float:
+    try:
+        return float(current_settings.get('processInterval', 300))
+    except (TypeError, ValueError):
+        return 300
+
+# Runs process_articles every processInterval seconds; manual triggers join a run in progress
+scheduler = ProcessingScheduler(process_articles, get_process_interval)
 
 @app.get("/settings")
 async def get_settings():
     try:
-        return db.get_settings()
+        return current_settings
     except Exception as e:
         logger.error(f"Error fetching settings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -198,57 +214,337 @@ async def get_settings():
 @app.post("/settings")
 async def update_settings(settings: Settings):
     try:
-        db.save_settings(settings.dict())
+        previous_interval = get_process_interval()
+        await db.save_settings(settings.dict())
+        # the snapshot holds values the way the database returns them
+        current_settings.update(await db.get_settings() or settings.dict())
+        # pick up a changed processInterval right away
+        if get_process_interval() != previous_interval:
+            scheduler.reschedule()
         return settings
     except Exception as e:
         logger.error(f"Error saving settings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma separated fields= projection."""
+    return [field.strip() for field in fields.split(",")] if fields else None
+
+def snapshot_key(name: str, fields: Optional[List[str]]) -> str:
+    """Snapshot name for the full `name` map with the projection `fields`, in a canonical order."""
+    return f"{name}?fields={','.join(sorted(set(fields)))}" if fields else name
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO date or datetime query parameter."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+
+def parse_timezone(name: Optional[str]):
+    try:
+        return ZoneInfo(name) if name else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+async def library_validators(request: Request) -> Validators:
+    """Validators of a read endpoint response: the library version plus the request path and query."""
+    version, changed_at = await db.get_library_version()
+    return Validators.for_version(version, changed_at, f"{request.url.path}?{request.url.query}")
+
+async def library_snapshot(request: Request, key: str, load: Callable[[], Dict[str, Any]]) -> Response:
+    """The full `key` map from the snapshot of the current library version, or a 304.
+
+    The validators depend on the version and `key` only: the snapshot ignores the
+    query, so a cache-buster or an unused parameter must not force a rebuild.
+    """
+    version, changed_at = await db.get_library_version()
+    validators = Validators.for_version(version, changed_at, key)
+    if validators.matches(request):
+        return validators.not_modified()
+    # reading, serializing and compressing all happen on a database thread
+    snapshot = await library_snapshots.get(
+        key, validators, lambda: db.run(lambda: EncodedResponse.encode(load(), validators))
+    )
+    return snapshot.response(request)
+
 @app.get("/articles")
-async def get_articles(filter_date: str = None):
+async def get_articles(request: Request,
+                       filter_date: str = None,
+                       date_from: Optional[str] = Query(None, alias="from"),
+                       date_to: Optional[str] = Query(None, alias="to"),
+                       tz: Optional[str] = None,
+                       limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                       cursor: Optional[str] = None,
+                       fields: Optional[str] = None):
+    """All articles keyed by url, or one keyset page when limit/cursor is given.
+
+    filter_date (a day) or from/to (ISO dates or datetimes, `to` exclusive)
+    restrict the publish date; values without an offset are read in `tz`
+    (an IANA name, UTC by default). Responses carry an ETag and Last-Modified;
+    a matching If-None-Match or If-Modified-Since gets a 304.
+    """
     try:
-        if filter_date:
-            target_date = datetime.strptime(filter_date, '%Y-%m-%d')
-            articles = db.get_articles(filter_date=target_date)
-        else:
-            articles = db.get_articles()
-        return articles
+        projection = parse_fields(fields)
+        if not (limit or cursor or filter_date or date_from or date_to):
+            return await library_snapshot(request, snapshot_key("articles", projection),
+                                          lambda: db.sync.get_articles(fields=projection, raise_errors=True))
+
+        async def load():
+            if limit or cursor:
+                return await db.get_articles_page(limit or DEFAULT_PAGE_SIZE, cursor=cursor, fields=projection)
+            zone = parse_timezone(tz)
+            if filter_date:
+                target_date = datetime.strptime(filter_date, '%Y-%m-%d')
+                return await db.get_articles(filter_date=target_date, tz=zone, fields=projection)
+            return await db.get_articles(
+                date_from=parse_timestamp(date_from) if date_from else None,
+                date_to=parse_timestamp(date_to) if date_to else None,
+                tz=zone,
+                fields=projection
+            )
+
+        return await json_response(request, await library_validators(request), load)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching articles: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/articles/detail")
+async def get_article(request: Request, url: str):
+    """A single article with its full content and summary."""
+    async def load():
+        article = await db.get_article(url)
+        if article is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        return article
+
+    try:
+        return await json_response(request, await library_validators(request), load)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching article {url}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/summaries")
-async def get_summaries():
+async def get_summaries(request: Request,
+                        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: Optional[str] = None,
+                        fields: Optional[str] = None):
+    """All summaries keyed by url, or one keyset page when limit/cursor is given.
+
+    The full map is served from a snapshot (one per fields= projection) rebuilt
+    only when articles or summaries change. Responses carry an ETag and
+    Last-Modified; a matching If-None-Match or If-Modified-Since gets a 304.
+    """
     try:
-        return db.get_summaries()
+        projection = parse_fields(fields)
+        if not (limit or cursor):
+            return await library_snapshot(request, snapshot_key("summaries", projection),
+                                          lambda: db.sync.get_summaries(fields=projection, raise_errors=True))
+        return await json_response(request, await library_validators(request), lambda: db.get_summaries_page(
+            limit or DEFAULT_PAGE_SIZE, cursor=cursor, fields=projection
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching summaries: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/search")
+async def search(request: Request,
+                 q: str = Query(..., min_length=1),
+                 limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                 offset: int = Query(0, ge=0)):
+    """Ranked full-text search over article titles, content and summaries."""
+    try:
+        return await json_response(request, await library_validators(request), lambda: db.search(q, limit, offset))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching for {q!r}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/search/rebuild")
+async def rebuild_search_index():
+    """Rebuild the full-text index from scratch, e.g. for a database restored from a backup."""
+    try:
+        return {"indexed": await db.rebuild_search_index()}
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rebuilding search index: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/feeds/status")
+async def get_feed_status():
+    """Per-feed result of the last poll: status, HTTP code, timing and entry counts."""
+    try:
+        states = await db.get_feed_states()
+        for state in states.values():
+            state.pop('entry_ids', None)
+        return states
+    except Exception as e:
+        logger.error(f"Error fetching feed status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/cache/summaries")
+async def get_summary_cache_stats():
+    try:
+        return await summary_cache.stats()
+    except Exception as e:
+        logger.error(f"Error fetching summary cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/summarizer/stats")
+async def get_summarizer_stats():
+    """LLM requests and tokens used, and requests/tokens saved by batching short articles."""
+    return summarizer.stats()
+
+@app.get("/cache/voices")
+async def get_voice_cache_status():
+    """Cached voice lists: age and fresh/stale state per provider, refreshes in flight and hit counts."""
+    return voice_cache.status()
+
+@app.get("/cache/library")
+async def get_library_snapshot_status():
+    """Stored /summaries and /articles snapshots: library version, ETag and size per encoding."""
+    return library_snapshots.status()
+
+@app.post("/cache/voices/invalidate")
+async def invalidate_voice_cache(provider: Optional[str] = None):
+    """Drop the cached voice list of one provider, or of all of them; the next request reloads it."""
+    return {"removed": voice_cache.invalidate(provider)}
+
+@app.post("/cache/summaries/evict")
+async def evict_summary_cache(max_age_days: Optional[float] = SUMMARY_CACHE_MAX_AGE_DAYS,
+                              max_bytes: Optional[int] = SUMMARY_CACHE_MAX_BYTES):
+    """Evict summary cache entries older than max_age_days or beyond max_bytes in total."""
+    try:
+        removed = await summary_cache.evict(max_age_days=max_age_days, max_bytes=max_bytes)
+        return {"removed": removed, **(await summary_cache.stats())}
+    except Exception as e:
+        logger.error(f"Error evicting summary cache: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/storage/audio/gc")
+async def collect_audio_garbage(grace_seconds: int = AUDIO_GC_GRACE_SECONDS):
+    """Delete audio blobs that no summary references."""
+    try:
+        removed = await db.run(collect_garbage, db.sync, grace_seconds=grace_seconds)
+        return {"removed": removed}
+    except Exception as e:
+        logger.error(f"Error collecting audio garbage: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/process")
-async def start_processing(background_tasks: BackgroundTasks):
-    """Start the article processing task."""
+async def start_processing():
+    """Start the article processing task, or join the one already running."""
     try:
-        logger.info("Starting article processing task")
+        joined = scheduler.running
+        logger.info("Joining running article processing task" if joined else "Starting article processing task")
         
         # Create output directory if it doesn't exist
         os.makedirs(OUTPUT_FOLDER, exist_ok=True)
         
         # Process articles in the background
-        background_tasks.add_task(process_articles)
+        scheduler.trigger("manual")
         
-        return {"status": "success", "message": "Article processing started"}
+        message = "Article processing already running" if joined else "Article processing started"
+        return {"status": "success", "message": message, "joined": joined}
     except Exception as e:
         logger.error(f"Error starting processing: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/process/status")
+async def get_processing_status():
+    """Scheduler state: whether a run is in progress, next run time and last run duration."""
+    return scheduler.status()
+
+@app.post("/process/pause")
+async def pause_processing():
+    """Stop scheduled runs; manual triggers still work."""
+    scheduler.pause()
+    return scheduler.status()
+
+@app.post("/process/resume")
+async def resume_processing():
+    scheduler.resume()
+    return scheduler.status()
+
+@app.get("/jobs")
+async def get_jobs(failed_limit: int = Query(50, ge=0, le=MAX_PAGE_SIZE)):
+    """Number of article jobs per state, plus the most recent permanent failures."""
+    try:
+        return await db.get_job_stats(failed_limit=failed_limit)
+    except Exception as e:
+        logger.error(f"Error fetching job stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/jobs/retry")
+async def retry_failed_jobs(url: Optional[List[str]] = Query(None)):
+    """Put failed jobs (all of them, or the given urls) back in line; the next run picks them up."""
+    try:
+        retried = await db.retry_failed_jobs(url)
+        return {"retried": retried}
+    except Exception as e:
+        logger.error(f"Error retrying failed jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/limits")
+async def get_rate_limits():
+    """Per-provider rate limits, current adaptive concurrency and throttle/retry counts."""
+    return limiter_status()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: stage and provider latencies, article outcomes, cache hits, queue depths."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+async def load_voices(provider: str):
+    logger.info(f"Fetching {provider} voices")
+    fetch = fetch_elevenlabs_voices if provider == "elevenlabs" else fetch_neets_voices
+    voices = await fetch(raise_errors=True)
+    logger.info(f"Found {len(voices)} {provider} voices")
+    return voices
+
+def sse_message(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
+
+@app.get("/events")
+async def stream_events(request: Request, since: Optional[str] = None):
+    """Server-sent events: run start/finish, article stage changes and new summaries.
+
+    Event types: `run`, `article`, `summary` (a /summaries entry without the
+    article content), `ready` (first event of a fresh stream: load the
+    library now) and `resync` (events were missed: reload the library).
+    Resume after a reconnect with ?since=<last event id> or the
+    Last-Event-ID header, which EventSource sends by itself.
+    """
+    cursor = since or request.headers.get("last-event-id") or None
+
+    async def stream():
+        async for event in event_bus.subscribe(cursor, heartbeat=EVENT_HEARTBEAT_SECONDS):
+            # a comment line keeps proxies from closing an idle stream
+            yield ": keep-alive\n\n" if event is None else sse_message(event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@app.get("/events/status")
+async def get_event_status():
+    """Last event id, how far back the replay buffer reaches and the number of connected clients."""
+    return event_bus.status()
+
 @app.get("/voices/elevenlabs")
 async def get_elevenlabs_voices():
     try:
-        logger.info("Fetching ElevenLabs voices")
-        voices = await fetch_elevenlabs_voices()
-        logger.info(f"Found {len(voices)} ElevenLabs voices")
-        return voices
+        return await voice_cache.get("elevenlabs", lambda: load_voices("elevenlabs"))
     except Exception as e:
         logger.error(f"Error fetching ElevenLabs voices: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -256,10 +552,7 @@ async def get_elevenlabs_voices():
 @app.get("/voices/neets")
 async def get_neets_voices():
     try:
-        logger.info("Fetching Neets voices")
-        voices = await fetch_neets_voices()
-        logger.info(f"Found {len(voices)} Neets voices")
-        return voices
+        return await voice_cache.get("neets", lambda: load_voices("neets"))
     except Exception as e:
         logger.error(f"Error fetching Neets voices: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,39 +1,164 @@
-import aiohttp
 import asyncio
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict
+from urllib.parse import urlsplit
+import aiohttp
 from newspaper import Article as NewsArticle
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+from loguru import logger
 from models import Article
-from datetime import datetime
+from http_client import get_http_client
+from rate_limit import classify, retry_after
+from metrics import observe
+from config import (
+    PARSE_WORKERS,
+    FETCH_CONCURRENCY,
+    FETCH_PER_HOST_CONCURRENCY,
+    FETCH_HOST_DELAY,
+    FETCH_MAX_BYTES,
+    FETCH_TIMEOUT,
+    FETCH_ATTEMPTS,
+    HTTP_CONNECT_TIMEOUT
+)
+from datetime import datetime, timezone
+
+# process pool for newspaper3k parsing, so CPU-bound html parsing never blocks the event loop
+_parse_pool = None
+
+def init_parse_pool():
+    """Start the parse worker processes. Call once from the app or CLI entry point."""
+    global _parse_pool
+    if _parse_pool is None and PARSE_WORKERS > 0:
+        # spawn rather than fork: the parent already runs event loop and resolver threads
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Article parse pool started with {PARSE_WORKERS} workers")
+    return _parse_pool
+
+def shutdown_parse_pool():
+    """Stop the parse worker processes."""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+        logger.info("Article parse pool stopped")
+
+def parse_article_html(url, html):
+    """Parse article html with newspaper3k, returning (title, text, publish_date).
+
+    Runs inside a parse worker process, so it only takes and returns plain data.
+    """
+    article = NewsArticle(url)
+    article.set_html(html)
+    article.parse()
+    return article.title, article.text, article.publish_date
+
+class ResponseTooLarge(ValueError):
+    pass
+
+@dataclass
+class _Host:
+    semaphore: asyncio.Semaphore
+    next_start: float = 0.0
+
+class FetchScheduler:
+    """Keeps article fetching polite.
+
+    At most `per_host` requests run against one host and consecutive
+    requests to a host start at least `min_delay` seconds apart, with
+    `global_limit` requests in flight overall. A host that answers 429 is
+    left alone for its Retry-After period.
+    """
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def __init__(self, global_limit: int = FETCH_CONCURRENCY, per_host: int = FETCH_PER_HOST_CONCURRENCY,
+                 min_delay: float = FETCH_HOST_DELAY):
+        self.per_host = per_host
+        self.min_delay = min_delay
+        self._global = asyncio.Semaphore(global_limit)
+        self._hosts: Dict[str, _Host] = {}
+
+    def _host(self, url: str) -> _Host:
+        host = urlsplit(url).hostname or ""
+        if host not in self._hosts:
+            self._hosts[host] = _Host(asyncio.Semaphore(self.per_host))
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = self._host(url)
+        # the host slot comes first, so requests waiting on a busy host don't hold global slots
+        async with host.semaphore:
+            now = time.monotonic()
+            start = max(now, host.next_start)
+            host.next_start = start + self.min_delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            async with self._global:
+                yield
+
+    def back_off(self, url: str, seconds: float) -> None:
+        host = self._host(url)
+        host.next_start = max(host.next_start, time.monotonic() + seconds)
+
+# one scheduler per event loop, since its semaphores belong to the loop they were first used on
+_fetch_scheduler = None
+_fetch_scheduler_loop = None
+
+def get_fetch_scheduler() -> FetchScheduler:
+    global _fetch_scheduler, _fetch_scheduler_loop
+    loop = asyncio.get_running_loop()
+    if _fetch_scheduler is None or _fetch_scheduler_loop is not loop:
+        _fetch_scheduler = FetchScheduler()
+        _fetch_scheduler_loop = loop
+    return _fetch_scheduler
+
+def _is_retryable(exc):
+    # 4xx and oversized pages fail the same way every time
+    return not isinstance(exc, ResponseTooLarge) and classify(exc) != 'fatal'
+
+@retry(
+    stop=stop_after_attempt(FETCH_ATTEMPTS),
+    wait=wait_exponential(multiplier=0.5, min=0.5, max=5),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True
+)
 async def fetch_article(session, url):
-    # fetch article content from url
-    async with session.get(url) as response:
-        response.raise_for_status()
-        return await response.text()
+    # fetch article content from url, within the per-host limits and with a size and time cap
+    scheduler = get_fetch_scheduler()
+    timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    async with scheduler.slot(url):
+        with observe('html_fetch'):
+            async with session.get(url, timeout=timeout) as response:
+                if response.status == 429:
+                    scheduler.back_off(url, retry_after(response) or FETCH_HOST_DELAY * 10)
+                response.raise_for_status()
+                if (response.content_length or 0) > FETCH_MAX_BYTES:
+                    raise ResponseTooLarge(f"{url} is {response.content_length} bytes, more than {FETCH_MAX_BYTES}")
+
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body.extend(chunk)
+                    if len(body) > FETCH_MAX_BYTES:
+                        raise ResponseTooLarge(f"{url} is more than {FETCH_MAX_BYTES} bytes")
+                try:
+                    return body.decode(response.charset or 'utf-8', errors='replace')
+                except LookupError:  # unknown charset in the Content-Type header
+                    return body.decode('utf-8', errors='replace')
 
 async def extract_article_content(url):
-    
-    async with aiohttp.ClientSession() as session:
-        # fetch html content
-        html = await fetch_article(session, url)
-        
-        # parse article using newspaper3k
-        article = NewsArticle(url)
-        article.set_html(html)
-        article.parse()
-        
-        title = article.title
-        content = article.text
-        publish_date = article.publish_date or datetime.now()
-        
-
-        return Article(url=url, title=title, content=content, publish_date=publish_date)
-
-async def extract_articles(urls):
-    # create tasks for each url
-    tasks = [extract_article_content(url) for url in urls]
-    # gather results asynchronously
-    articles = await asyncio.gather(*tasks)
-    # filter out None values and return list of articles
-    return [article for article in articles if article is not None]
\ No newline at end of file
+    # fetch html content over the shared connection pool
+    html = await fetch_article(get_http_client(), url)
+
+    # parse article using newspaper3k in the parse pool (a thread when PARSE_WORKERS is 0)
+    loop = asyncio.get_running_loop()
+    with observe('parse'):
+        title, content, publish_date = await loop.run_in_executor(init_parse_pool(), parse_article_html, url, html)
+    publish_date = publish_date or datetime.now(timezone.utc)
+
+    return Article(url=url, title=title, content=content, publish_date=publish_date)
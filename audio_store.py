@@ -0,0 +1,94 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from loguru import logger
+from summarization import normalize_text
+from config import OUTPUT_FOLDER, AUDIO_TMP_FOLDER, ELEVENLABS_MODEL, AUDIO_GC_GRACE_SECONDS
+
+# audio files are content addressed: <sha256 of text + tts parameters>.mp3 in OUTPUT_FOLDER,
+# served through the /audio static mount and shared by every summary with the same narration.
+# <hash>.preview.mp3 holds the first segment of a narration that is still being synthesized.
+AUDIO_URL_PREFIX = "/audio/"
+_BLOB_NAME = re.compile(r'^[0-9a-f]{64}(\.preview)?\.mp3$')
+
+def audio_blob_name(text, provider, voice_id, model=None):
+    """File name of the narration of `text` with the given TTS parameters."""
+    if provider == "elevenlabs":
+        model = ELEVENLABS_MODEL
+    payload = f"{provider}\0{voice_id}\0{model or ''}\0{normalize_text(text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest() + ".mp3"
+
+def audio_blob_path(name):
+    return os.path.join(OUTPUT_FOLDER, name)
+
+def audio_url(name):
+    return AUDIO_URL_PREFIX + name
+
+def is_audio_blob(name):
+    return bool(_BLOB_NAME.match(name))
+
+def audio_preview_name(name):
+    return name[:-len(".mp3")] + ".preview.mp3"
+
+def publish_preview(segment_path, name):
+    """Copy the first segment of the narration `name` into the audio folder; returns the preview's name."""
+    preview = audio_preview_name(name)
+    os.makedirs(AUDIO_TMP_FOLDER, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=AUDIO_TMP_FOLDER)
+    os.close(fd)
+    try:
+        shutil.copyfile(segment_path, tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, audio_blob_path(preview))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return preview
+
+def collect_garbage(db, grace_seconds=AUDIO_GC_GRACE_SECONDS):
+    """Delete audio blobs no summary points at, and abandoned partial downloads and segments.
+
+    Anything younger than `grace_seconds` is kept, since a running pipeline
+    may have synthesized it without saving the summary yet.
+    """
+    referenced = {
+        path[len(AUDIO_URL_PREFIX):]
+        for path in db.get_audio_paths()
+        if path.startswith(AUDIO_URL_PREFIX)
+    }
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for name in os.listdir(OUTPUT_FOLDER):
+        if not is_audio_blob(name) or name in referenced:
+            continue
+        path = audio_blob_path(name)
+        try:
+            if os.path.getmtime(path) > cutoff:
+                continue
+            os.remove(path)
+            removed.append(name)
+        except OSError as e:
+            logger.error(f"Error removing audio blob {name}: {str(e)}")
+    if removed:
+        logger.info(f"Removed {len(removed)} unreferenced audio blobs")
+
+    # segments of narrations that were never finished, and downloads cut short
+    if os.path.isdir(AUDIO_TMP_FOLDER):
+        for name in os.listdir(AUDIO_TMP_FOLDER):
+            path = os.path.join(AUDIO_TMP_FOLDER, name)
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError as e:
+                logger.error(f"Error removing partial audio {name}: {str(e)}")
+    return removed
@@ -0,0 +1,207 @@
+"""Load benchmark: API read throughput and latency while article processing runs.
+
+Starts the stub servers from benchmarks/stubs.py and the FastAPI app (in a
+child process, with a scratch database seeded with --seed-rows summaries).
+It then keeps --concurrency clients requesting --path in two phases:
+
+* idle        for --idle-seconds, nothing else running
+* processing  from POST /process until the run finishes
+
+For each phase it reports requests/sec and p50/p95/p99/max latency. With
+--blocking the app calls Database inline on the event loop, as it did
+before AsyncDatabase, so the two can be compared. --db-latency adds a
+delay to every Database call, standing in for slow storage or lock waits.
+With --conditional each client sends back the ETag it last received, like
+a browser reloading the library, so unchanged responses come back as 304s:
+
+    python benchmarks/api_load_bench.py --path "/summaries?limit=50" --db-latency 0.01
+    python benchmarks/api_load_bench.py --path "/summaries?limit=50" --db-latency 0.01 --blocking
+    python benchmarks/api_load_bench.py --path /summaries --conditional
+"""
+import argparse
+import asyncio
+import functools
+import multiprocessing
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import aiohttp
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+import stubs
+from e2e_bench import ROOT, enter_workdir, load_module, wait_for
+
+def seed(db, rows):
+    """Articles with summaries, published over the last few days."""
+    now = datetime.now(timezone.utc)
+    articles = [{
+        'url': f"https://seed.example.com/news/{i}",
+        'title': f"Seeded article {i}",
+        'content': " ".join(stubs.WORDS[j % len(stubs.WORDS)] for j in range(i % 7, 600 + i % 7)),
+        'publish_date': (now - timedelta(minutes=7 * i)).isoformat()
+    } for i in range(rows)]
+    db.save_articles(articles)
+    db.save_summaries({
+        article['url']: {'summary': article['content'][:600], 'audio_path': f"/audio/{i:064x}.mp3"}
+        for i, article in enumerate(articles)
+    })
+
+def slow_down(db, delay):
+    """Make every public Database method on `db` sleep for `delay` seconds first."""
+    def slowed(method):
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            time.sleep(delay)
+            return method(*args, **kwargs)
+        return call
+
+    for name in dir(db):
+        method = getattr(db, name)
+        if not name.startswith('_') and name not in ('get_db', 'close') and callable(method):
+            setattr(db, name, slowed(method))
+
+def serve_api(stub_port, api_port, feeds, seed_rows, blocking, db_latency):
+    """Child process: run the API app with uvicorn against the stubs."""
+    enter_workdir("api-load", stub_port)
+    import uvicorn
+    from db import AsyncDatabase
+
+    app = load_module("narrate_api", ROOT / "api" / "main.py")
+    app.db.sync.save_settings({
+        'ttsProvider': 'neets',
+        'voice': 'stub-voice',
+        'neetModel': 'vits',
+        'summarizerModel': app.SUMMARIZER_MODEL,
+        'rssFeeds': feeds,
+        'autoPlay': False,
+        'processInterval': 24 * 3600  # no scheduled run during the benchmark
+    })
+    app.current_settings.update(app.db.sync.get_settings())
+    seed(app.db.sync, seed_rows)
+    if db_latency:
+        slow_down(app.db.sync, db_latency)
+
+    if blocking:
+        class InlineDatabase(AsyncDatabase):
+            async def run(self, fn, *args, **kwargs):
+                return fn(*args, **kwargs)
+
+        app.db = app.summary_cache.db = InlineDatabase(app.db.sync)
+
+    uvicorn.run(app.app, host="127.0.0.1", port=api_port, log_level="warning")
+
+def quantile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def load(session, url, concurrency, done, conditional=False):
+    """Request `url` from `concurrency` clients until `done` resolves.
+
+    Returns latencies, errors, elapsed seconds and the number of 304 answers.
+    """
+    latencies, errors, not_modified = [], 0, 0
+
+    async def client():
+        nonlocal errors, not_modified
+        etag = None
+        while not done.done():
+            start = time.perf_counter()
+            headers = {'If-None-Match': etag} if conditional and etag else {}
+            try:
+                async with session.get(url, headers=headers) as response:
+                    await response.read()
+                    if response.status == 304:
+                        not_modified += 1
+                    elif response.status == 200:
+                        etag = response.headers.get('ETag')
+                    else:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start, not_modified
+
+async def wait_for_run(session, base, timeout):
+    """Resolves once the processing run started by POST /process has finished."""
+    deadline = time.monotonic() + timeout
+    async with session.post(f"{base}/process") as response:
+        response.raise_for_status()
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+        async with session.get(f"{base}/process/status") as response:
+            status = await response.json()
+        if not status['running'] and status['runs']:
+            return status['last_run']
+    raise TimeoutError(f"processing did not finish within {timeout}s")
+
+def report(phase, latencies, errors, seconds, not_modified=0):
+    print(f"== {phase}: {len(latencies)} requests in {seconds:.1f}s -> {len(latencies) / seconds:.1f} req/s"
+          f"{f', {not_modified} not modified' if not_modified else ''}"
+          f"{f', {errors} errors' if errors else ''}")
+    if latencies:
+        print("   latency ms  " + "  ".join(
+            f"{name} {value * 1000:.1f}" for name, value in (
+                ('p50', quantile(latencies, 0.5)),
+                ('p95', quantile(latencies, 0.95)),
+                ('p99', quantile(latencies, 0.99)),
+                ('max', max(latencies))
+            )
+        ))
+
+async def run_load(args):
+    base = f"http://127.0.0.1:{args.api_port}"
+    url = base + args.path
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        idle = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().call_later(args.idle_seconds, idle.set_result, None)
+        report("idle", *await load(session, url, args.concurrency, idle, args.conditional))
+
+        run = asyncio.ensure_future(wait_for_run(session, base, args.timeout))
+        report("processing", *await load(session, url, args.concurrency, run, args.conditional))
+        print(f"   processing run: {run.result()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="API load benchmark during article processing")
+    stubs.add_arguments(parser)
+    parser.add_argument("--port", type=int, default=8931, help="stub server port")
+    parser.add_argument("--api-port", type=int, default=8932)
+    parser.add_argument("--path", default="/summaries", help="endpoint under load")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed-rows", type=int, default=1000)
+    parser.add_argument("--idle-seconds", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=600, help="give up on the processing run after this")
+    parser.add_argument("--blocking", action="store_true", help="call Database on the event loop (old behaviour)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds added to every Database call")
+    parser.add_argument("--conditional", action="store_true", help="send If-None-Match with the last ETag received")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    stub_server = ctx.Process(target=stubs.serve, args=(stubs.config_from_args(args), args.port), daemon=True)
+    stub_server.start()
+    feeds = [f"http://127.0.0.1:{args.port}/feeds/{i}.xml" for i in range(args.feeds)]
+    api = ctx.Process(target=serve_api, args=(args.port, args.api_port, feeds, args.seed_rows, args.blocking, args.db_latency))
+    try:
+        wait_for(feeds[0])
+        api.start()
+        wait_for(f"http://127.0.0.1:{args.api_port}/process/status", timeout=60)
+        asyncio.run(run_load(args))
+    finally:
+        for process in (api, stub_server):
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+if __name__ == "__main__":
+    main()
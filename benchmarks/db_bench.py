@@ -0,0 +1,95 @@
+"""Micro-benchmark for Database: per-call connections vs persistent WAL connections.
+
+Also checks that date-range article queries are answered from idx_articles_date.
+Run from the repository root:
+
+    python benchmarks/db_bench.py --rows 2000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db import Database
+
+class LegacyDatabase(Database):
+    """The previous behaviour: a fresh rollback-journal connection for every call."""
+
+    @contextmanager
+    def get_db(self):
+        conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
+
+def make_article(i):
+    return {
+        'url': f"https://example.com/news/{i}",
+        'title': f"Article {i}",
+        'content': "Lorem ipsum dolor sit amet. " * 80,
+        'publish_date': (datetime(2024, 1, 1) + timedelta(minutes=i)).isoformat()
+    }
+
+def timed(label, ops, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return label, ops, ops / elapsed if elapsed else float('inf')
+
+def run(db_cls, rows, reads):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = db_cls(os.path.join(tmp, "bench.db"))
+        articles = [make_article(i) for i in range(rows)]
+        results = [
+            timed("save_article", rows, lambda: [db.save_article(a) for a in articles]),
+            timed("save_summary", rows, lambda: [
+                db.save_summary(a['url'], {'summary': "summary " * 40, 'audio_path': f"/audio/{i}.mp3"})
+                for i, a in enumerate(articles)
+            ]),
+            timed("get_settings", reads * 10, lambda: [db.get_settings() for _ in range(reads * 10)]),
+            timed("get_summaries", reads, lambda: [db.get_summaries() for _ in range(reads)]),
+        ]
+        db.close()
+        return results
+
+def check_date_range_plan():
+    """Fail loudly if the date-range query stops using idx_articles_date."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "plan.db"))
+        sql, params = db.articles_query(date_from=datetime(2024, 1, 1), date_to=datetime(2024, 1, 2))
+        with db.get_db() as conn:
+            plan = [row['detail'] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        db.close()
+    print("date-range plan:", "; ".join(plan))
+    if not any("USING INDEX idx_articles_date" in step for step in plan):
+        raise SystemExit("date-range query does not use idx_articles_date")
+
+def main():
+    parser = argparse.ArgumentParser(description="Database micro-benchmark")
+    parser.add_argument("--rows", type=int, default=2000, help="articles/summaries to write")
+    parser.add_argument("--reads", type=int, default=20, help="full-library reads")
+    args = parser.parse_args()
+
+    check_date_range_plan()
+
+    before = run(LegacyDatabase, args.rows, args.reads)
+    after = run(Database, args.rows, args.reads)
+
+    print(f"{'operation':<16}{'ops':>8}{'before ops/s':>16}{'after ops/s':>16}{'speedup':>10}")
+    for (label, ops, old), (_, _, new) in zip(before, after):
+        print(f"{label:<16}{ops:>8}{old:>16.1f}{new:>16.1f}{new / old:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
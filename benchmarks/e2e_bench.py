@@ -0,0 +1,273 @@
+"""End-to-end benchmark of the API's process_articles and the CLI's process_feeds, fully offline.
+
+The stub servers in benchmarks/stubs.py stand in for the RSS feeds, the
+article pages, the LLM and the TTS providers. Each mode runs in its own
+process with a fresh database and output folder. The report covers
+articles/sec, p50/p95 latency per stage and per provider, peak RSS memory
+and database size. Stage quantiles are interpolated from the Prometheus
+histograms, the same way histogram_quantile() does it.
+
+Run from the repository root:
+
+    python benchmarks/e2e_bench.py --articles-per-feed 50 --llm-latency 0.8 --tts-latency 1.0
+    python benchmarks/e2e_bench.py --mode api --llm-error-rate 0.1 --label flaky-llm
+    python benchmarks/e2e_bench.py --compare benchmarks/results/<earlier run>.json
+
+Results are saved to benchmarks/results/ as JSON. With --compare the run
+fails when articles/sec drops by more than --max-regression compared with
+the earlier result.
+"""
+import argparse
+import asyncio
+import builtins
+import importlib.util
+import json
+import math
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).parent))
+
+import stubs
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+def histogram_quantiles(name, label, quantiles=(0.5, 0.95)):
+    """Per-label quantiles of a Prometheus histogram, interpolated within buckets."""
+    from prometheus_client import REGISTRY
+    series = {}
+    for family in REGISTRY.collect():
+        if family.name != name:
+            continue
+        for sample in family.samples:
+            if sample.name.endswith('_bucket'):
+                series.setdefault(sample.labels[label], []).append((float(sample.labels['le']), sample.value))
+
+    result = {}
+    for key, buckets in series.items():
+        buckets.sort()
+        total = buckets[-1][1]
+        if not total:
+            continue
+        stats = {'count': int(total)}
+        for q in quantiles:
+            rank = q * total
+            lower, below = 0.0, 0.0
+            value = lower
+            for upper, count in buckets:
+                if count >= rank:
+                    if math.isinf(upper):
+                        value = lower
+                    else:
+                        value = lower + (upper - lower) * ((rank - below) / (count - below) if count > below else 0)
+                    break
+                lower, below = upper, count
+            stats[f"p{int(q * 100)}"] = round(value, 4)
+        result[key] = stats
+    return result
+
+def folder_size(path):
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file()) if os.path.isdir(path) else 0
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def enter_workdir(name, port):
+    """Chdir to a fresh scratch directory and point every provider at the stubs on `port`."""
+    workdir = tempfile.mkdtemp(prefix=f"narrate-bench-{name}-")
+    os.chdir(workdir)
+    os.makedirs("output", exist_ok=True)
+    base = f"http://127.0.0.1:{port}"
+    os.environ.update({
+        'ELEVEN_API_KEY': 'stub',
+        'NEETS_API_KEY': 'stub',
+        'OPENROUTER_API_KEY': 'stub',
+        'SUMMARIZER_API_BASE': f"{base}/llm",
+        'ELEVENLABS_API_BASE': f"{base}/elevenlabs",
+        'NEETS_API_BASE': f"{base}/neets",
+        # offline: use litellm's bundled model list instead of downloading it
+        'LITELLM_LOCAL_MODEL_COST_MAP': 'True',
+    })
+    sys.path.insert(0, str(ROOT))
+
+    from loguru import logger
+    logger.remove()
+    logger.add(os.path.join(workdir, "bench.log"), level="INFO")
+    return workdir
+
+def run_mode(mode, port, feeds, tts_provider, results):
+    """Child process: run one processing pass in a scratch directory and report measurements."""
+    workdir = enter_workdir(mode, port)
+
+    from http_client import init_http_client, close_http_client
+    from article_extraction import init_parse_pool, shutdown_parse_pool
+    from rate_limit import limiter_status
+
+    if mode == "api":
+        app = load_module("narrate_api", ROOT / "api" / "main.py")
+        app.db.sync.save_settings({
+            'ttsProvider': tts_provider,
+            'voice': 'stub-voice',
+            'neetModel': 'vits',
+            'rssFeeds': feeds,
+        })
+        app.current_settings.update(app.db.sync.get_settings())
+        job, db, summarizer = app.process_articles, app.db, app.summarizer
+    else:
+        cli = load_module("narrate_cli", ROOT / "main.py")
+        cli.RSS_FEEDS = feeds
+        builtins.input = lambda prompt="": ""  # take the defaults at every prompt
+        job, db, summarizer = cli.process_feeds, cli.db, cli.summarizer
+
+    async def timed_run():
+        await init_http_client()
+        init_parse_pool()
+        try:
+            start = time.perf_counter()
+            await job()
+            return time.perf_counter() - start
+        finally:
+            await close_http_client()
+            shutdown_parse_pool()
+
+    elapsed = asyncio.run(timed_run())
+    completed = len(db.sync.get_summaries())
+    jobs = db.sync.get_job_stats(failed_limit=5)
+    db.close()
+
+    results.put({
+        'mode': mode,
+        'seconds': round(elapsed, 3),
+        'articles_completed': completed,
+        'articles_per_sec': round(completed / elapsed, 3) if elapsed else None,
+        'jobs': jobs,
+        'stages': histogram_quantiles('narratenews_stage_duration_seconds', 'stage'),
+        'providers': histogram_quantiles('narratenews_provider_call_duration_seconds', 'provider'),
+        'limits': {
+            name: {key: status[key] for key in ('calls', 'throttled', 'retries', 'failures', 'wait_seconds')}
+            for name, status in limiter_status().items() if status['calls']
+        },
+        'summarizer': summarizer.stats(),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'peak_child_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        'db_bytes': sum(
+            os.path.getsize(name) for name in os.listdir(workdir) if name.startswith("narrate_news.db")
+        ),
+        'audio_bytes': folder_size("output"),
+        'workdir': workdir
+    })
+
+def wait_for(url, timeout=15):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+def print_report(run):
+    print(f"\n== {run['mode']}: {run['articles_completed']} articles in {run['seconds']}s "
+          f"-> {run['articles_per_sec']} articles/s")
+    print(f"   peak RSS {run['peak_rss_mb']} MB (parse workers {run['peak_child_rss_mb']} MB), "
+          f"db {run['db_bytes'] / 1024:.0f} KB, audio {run['audio_bytes'] / 1024 / 1024:.1f} MB")
+    print(f"   jobs {run['jobs'].get('counts')}")
+    print(f"   {'stage':<22}{'count':>8}{'p50 s':>10}{'p95 s':>10}")
+    for kind in ('stages', 'providers'):
+        for name, stats in sorted(run[kind].items()):
+            label = name if kind == 'stages' else f"provider:{name}"
+            print(f"   {label:<22}{stats['count']:>8}{stats['p50']:>10.3f}{stats['p95']:>10.3f}")
+    if run['limits']:
+        print(f"   limits {run['limits']}")
+    print(f"   summarizer {run['summarizer']}")
+
+def compare(current, previous, max_regression):
+    """Print the change per mode; return False if throughput regressed beyond max_regression."""
+    ok = True
+    before = {run['mode']: run for run in previous['runs']}
+    print(f"\n== compared with {previous['label']} ({previous['started_at']})")
+    for run in current['runs']:
+        old = before.get(run['mode'])
+        if old is None or not old['articles_per_sec']:
+            continue
+        change = run['articles_per_sec'] / old['articles_per_sec'] - 1
+        print(f"   {run['mode']}: {old['articles_per_sec']} -> {run['articles_per_sec']} articles/s ({change:+.1%})")
+        for stage, stats in run['stages'].items():
+            if stage in old['stages']:
+                print(f"      {stage:<14} p95 {old['stages'][stage]['p95']:.3f}s -> {stats['p95']:.3f}s")
+        if change < -max_regression:
+            print(f"   {run['mode']} throughput regressed by more than {max_regression:.0%}")
+            ok = False
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    stubs.add_arguments(parser)
+    parser.add_argument("--port", type=int, default=8931)
+    parser.add_argument("--mode", choices=("api", "cli", "both"), default="both")
+    parser.add_argument("--tts-provider", choices=("neets", "elevenlabs"), default="neets",
+                        help="provider used by the API run (the CLI takes its default)")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--no-save", action="store_true", help="don't write the result to benchmarks/results/")
+    parser.add_argument("--compare", help="earlier result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    stub_server = ctx.Process(target=stubs.serve, args=(stubs.config_from_args(args), args.port), daemon=True)
+    stub_server.start()
+    feeds = [f"http://127.0.0.1:{args.port}/feeds/{i}.xml" for i in range(args.feeds)]
+    try:
+        wait_for(feeds[0])
+        runs = []
+        for mode in (("api", "cli") if args.mode == "both" else (args.mode,)):
+            results = ctx.Queue()
+            child = ctx.Process(target=run_mode, args=(mode, args.port, feeds, args.tts_provider, results))
+            child.start()
+            while True:
+                try:
+                    run = results.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not child.is_alive():
+                        raise SystemExit(f"{mode} run failed (exit code {child.exitcode})")
+            child.join()
+            runs.append(run)
+            print_report(run)
+    finally:
+        stub_server.terminate()
+        stub_server.join()
+
+    result = {
+        'label': args.label,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {key: value for key, value in vars(args).items() if key not in ('compare', 'no_save')},
+        'runs': runs
+    }
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{args.label}.json"
+        path.write_text(json.dumps(result, indent=2))
+        print(f"\nSaved {path}")
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        if not compare(result, previous, args.max_regression):
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Local stand-ins for everything the pipeline talks to, for offline benchmarks.
+
+One aiohttp app serves:
+
+* RSS feeds            GET  /feeds/{feed}.xml
+* article pages        GET  /articles/{feed}/{n}.html
+* an OpenAI-compatible LLM (what litellm calls with SUMMARIZER_API_BASE)
+                       POST /llm/chat/completions
+* ElevenLabs-compatible TTS
+                       GET  /elevenlabs/voices
+                       POST /elevenlabs/text-to-speech/{voice}/stream
+* Neets-compatible TTS GET  /neets/voices
+                       POST /neets/tts
+
+Every service has its own latency and error rate. Article pages are served
+from several loopback addresses (127.0.0.1, 127.0.0.2, ...) so per-host
+fetch limits behave as they would against several publishers.
+
+Run standalone with:
+
+    python benchmarks/stubs.py --port 8900 --llm-latency 0.8 --llm-error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict
+from aiohttp import web
+
+WORDS = (
+    "government officials said on tuesday that the new measures would take effect next month after "
+    "weeks of negotiations between ministers regional leaders and industry groups who warned that "
+    "rising costs could affect millions of households across the country while analysts expect the "
+    "economy to grow more slowly than forecast as exports fall and investment remains weak despite "
+    "efforts by the central bank to support lending to small businesses and first time buyers"
+).split()
+
+@dataclass
+class ServiceConfig:
+    latency: float = 0.0       # mean seconds per request
+    jitter: float = 0.2        # +/- fraction of latency
+    error_rate: float = 0.0    # share of requests answered with an error
+
+@dataclass
+class StubConfig:
+    feeds: int = 2
+    articles_per_feed: int = 50
+    hosts: int = 4
+    short_share: float = 0.3   # share of short wire items; the rest are 500-1500 word long-reads
+    seed: int = 1
+    services: Dict[str, ServiceConfig] = field(default_factory=lambda: {
+        'rss': ServiceConfig(0.05),
+        'html': ServiceConfig(0.15),
+        'llm': ServiceConfig(0.8),
+        'tts': ServiceConfig(1.0),
+    })
+
+    def article_url(self, port: int, feed: int, n: int) -> str:
+        host = f"127.0.0.{(feed * self.articles_per_feed + n) % self.hosts + 1}"
+        return f"http://{host}:{port}/articles/{feed}/{n}.html"
+
+async def _delay(service: ServiceConfig) -> None:
+    if service.latency > 0:
+        await asyncio.sleep(service.latency * random.uniform(1 - service.jitter, 1 + service.jitter))
+
+def _failed(service: ServiceConfig) -> bool:
+    return random.random() < service.error_rate
+
+def _throttled() -> web.Response:
+    return web.json_response({'error': {'message': 'rate limited'}}, status=429, headers={'Retry-After': '1'})
+
+def _paragraphs(rng: random.Random, words: int) -> list:
+    paragraphs = []
+    while words > 0:
+        length = min(words, rng.randint(40, 120))
+        text = " ".join(rng.choice(WORDS) for _ in range(length))
+        paragraphs.append(text[0].upper() + text[1:] + ".")
+        words -= length
+    return paragraphs
+
+def article_page(config: StubConfig, feed: int, n: int) -> str:
+    rng = random.Random(config.seed * 100003 + feed * 1009 + n)
+    words = rng.randint(60, 150) if rng.random() < config.short_share else rng.randint(500, 1500)
+    title = f"Story {feed}-{n}: " + " ".join(rng.choice(WORDS) for _ in range(8)).capitalize()
+    published = datetime.now(timezone.utc).isoformat()
+    body = "\n".join(f"<p>{p}</p>" for p in _paragraphs(rng, words))
+    nav = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(20))
+    return f"""<!DOCTYPE html>
+<html lang="en"><head>
+<meta charset="utf-8"><title>{title}</title>
+<meta property="og:title" content="{title}">
+<meta property="article:published_time" content="{published}">
+<script>window.analytics = {{"page": "{feed}-{n}"}};</script>
+<link rel="stylesheet" href="/static/site.css">
+</head><body>
+<header><nav><ul>{nav}</ul></nav></header>
+<main><article>
+<h1>{title}</h1>
+<time datetime="{published}">{published}</time>
+{body}
+</article>
+<aside><h2>Most read</h2><ul>{nav}</ul></aside></main>
+<footer><p>Copyright Stub News</p></footer>
+</body></html>"""
+
+def rss_document(config: StubConfig, port: int, feed: int) -> str:
+    now = format_datetime(datetime.now(timezone.utc))
+    items = "".join(
+        f"<item><title>Story {feed}-{n}</title><link>{config.article_url(port, feed, n)}</link>"
+        f"<guid>{config.article_url(port, feed, n)}</guid><pubDate>{now}</pubDate></item>"
+        for n in range(config.articles_per_feed)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>Stub feed {feed}</title><link>http://127.0.0.1:{port}/</link>"
+        f"<description>Benchmark feed</description>{items}</channel></rss>"
+    )
+
+def mp3_frames(seconds: float) -> bytes:
+    """Valid MPEG-1 Layer III frames (128 kbps, 44.1 kHz) of silence-like data for `seconds` of audio."""
+    frames = []
+    for i in range(max(1, int(seconds * 38.28))):
+        padding = i % 3 != 2  # 417/418-byte frames average out to 128 kbps
+        header = bytes([0xFF, 0xFB, 0x90 | (padding << 1), 0x64])
+        frames.append(header + b"\x00" * (417 + padding - 4))
+    return b"".join(frames)
+
+def summarize_stub(content: str) -> str:
+    words = re.sub(r"\s+", " ", content).split(" ")
+    return " ".join(words[:60]) + "."
+
+def create_app(config: StubConfig) -> web.Application:
+    services = config.services
+    app = web.Application()
+    app['requests'] = {name: 0 for name in services}
+
+    async def feed(request):
+        app['requests']['rss'] += 1
+        await _delay(services['rss'])
+        if _failed(services['rss']):
+            return web.Response(status=503)
+        document = rss_document(config, request.url.port, int(request.match_info['feed']))
+        return web.Response(text=document, content_type='application/rss+xml')
+
+    async def article(request):
+        app['requests']['html'] += 1
+        await _delay(services['html'])
+        if _failed(services['html']):
+            return web.Response(status=503)
+        page = article_page(config, int(request.match_info['feed']), int(request.match_info['n']))
+        return web.Response(text=page, content_type='text/html')
+
+    async def chat_completions(request):
+        app['requests']['llm'] += 1
+        payload = await request.json()
+        await _delay(services['llm'])
+        if _failed(services['llm']):
+            return _throttled()
+        system, content = payload['messages'][0]['content'], payload['messages'][-1]['content']
+        if '"summaries"' in system:
+            articles = json.loads(content)['articles']
+            answer = json.dumps({'summaries': [
+                {'id': a['id'], 'summary': summarize_stub(a['text'])} for a in articles
+            ]})
+        else:
+            answer = summarize_stub(content)
+        prompt_tokens = (len(system) + len(content)) // 4
+        return web.json_response({
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(datetime.now().timestamp()),
+            'model': payload.get('model', 'stub'),
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': answer}}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(answer) // 4,
+                'total_tokens': prompt_tokens + len(answer) // 4
+            }
+        })
+
+    async def tts(request, text):
+        app['requests']['tts'] += 1
+        await _delay(services['tts'])
+        if _failed(services['tts']):
+            return _throttled()
+        # roughly 15 characters of speech per second
+        return web.Response(body=mp3_frames(len(text) / 15), content_type='audio/mpeg')
+
+    async def elevenlabs_tts(request):
+        return await tts(request, (await request.json())['text'])
+
+    async def neets_tts(request):
+        return await tts(request, (await request.json())['text'])
+
+    async def elevenlabs_voices(request):
+        return web.json_response({'voices': [{'voice_id': 'stub-voice', 'name': 'Stub'}]})
+
+    async def neets_voices(request):
+        return web.json_response([{'id': 'stub-voice', 'title': 'Stub', 'supported_models': ['vits']}])
+
+    async def stats(request):
+        return web.json_response(app['requests'])
+
+    app.router.add_get('/feeds/{feed}.xml', feed)
+    app.router.add_get('/articles/{feed}/{n}.html', article)
+    app.router.add_post('/llm/chat/completions', chat_completions)
+    app.router.add_get('/elevenlabs/voices', elevenlabs_voices)
+    app.router.add_post('/elevenlabs/text-to-speech/{voice}/stream', elevenlabs_tts)
+    app.router.add_get('/neets/voices', neets_voices)
+    app.router.add_post('/neets/tts', neets_tts)
+    app.router.add_get('/stats', stats)
+    return app
+
+async def start(config: StubConfig, port: int) -> web.AppRunner:
+    """Serve the stubs on 127.0.0.1..127.0.0.<hosts> at `port`."""
+    runner = web.AppRunner(create_app(config), access_log=None)
+    await runner.setup()
+    for i in range(1, max(1, config.hosts) + 1):
+        await web.TCPSite(runner, f"127.0.0.{i}", port).start()
+    return runner
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--feeds", type=int, default=2)
+    parser.add_argument("--articles-per-feed", type=int, default=50)
+    parser.add_argument("--hosts", type=int, default=4, help="loopback addresses article pages are spread over")
+    parser.add_argument("--short-share", type=float, default=0.3)
+    for name, default in (('rss', 0.05), ('html', 0.15), ('llm', 0.8), ('tts', 1.0)):
+        parser.add_argument(f"--{name}-latency", type=float, default=default, help=f"mean {name} latency (s)")
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0)
+
+def config_from_args(args) -> StubConfig:
+    return StubConfig(
+        feeds=args.feeds,
+        articles_per_feed=args.articles_per_feed,
+        hosts=args.hosts,
+        short_share=args.short_share,
+        services={
+            name: ServiceConfig(getattr(args, f"{name}_latency"), error_rate=getattr(args, f"{name}_error_rate"))
+            for name in ('rss', 'html', 'llm', 'tts')
+        }
+    )
+
+def serve(config: StubConfig, port: int) -> None:
+    """Run the stubs until the process is killed (used as a child process by the benchmark)."""
+    async def main():
+        await start(config, port)
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NarrateNews stub servers")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+    print(f"Serving stubs on port {args.port}")
+    serve(config_from_args(args), args.port)
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from loguru import logger
+from metrics import CACHE_REQUESTS
+
+@dataclass
+class _Entry:
+    value: Any
+    loaded_at: float  # time.monotonic()
+
+class AsyncTTLCache:
+    """In-memory cache for values loaded by a coroutine, e.g. provider voice lists.
+
+    A value is fresh for `ttl` seconds. For `stale_ttl` seconds after that it
+    is still returned right away while one background task reloads it
+    (stale-while-revalidate). Callers that miss while a load for the same key
+    is running wait for that load instead of starting their own (single
+    flight), so a burst of requests makes at most one upstream call. Failed
+    loads are not cached.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._loads: Dict[Hashable, asyncio.Task] = {}
+        self.counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'loads': 0,
+            'errors': 0
+        }
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """The cached value of `key`, calling `loader()` to (re)load it when needed."""
+        entry = self._entries.get(key)
+        age = time.monotonic() - entry.loaded_at if entry else None
+        if entry is not None and age < self.ttl:
+            self.counters['hits'] += 1
+            CACHE_REQUESTS.labels(self.name, 'hit').inc()
+            return entry.value
+        if entry is not None and age < self.ttl + self.stale_ttl:
+            self.counters['stale_hits'] += 1
+            CACHE_REQUESTS.labels(self.name, 'stale').inc()
+            self._start_load(key, loader)
+            return entry.value
+
+        self.counters['misses'] += 1
+        CACHE_REQUESTS.labels(self.name, 'miss').inc()
+        if key in self._loads:
+            self.counters['coalesced'] += 1
+        # shielded: a caller that goes away must not cancel the load the others wait for
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._loads.get(key)
+        if task is None:
+            task = self._loads[key] = asyncio.ensure_future(self._load(key, loader))
+            # background refreshes have no caller to see their error; it is logged in _load
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        self.counters['loads'] += 1
+        try:
+            value = await loader()
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.warning(f"Loading {key} into the {self.name} cache failed: {str(e)}")
+            raise
+        finally:
+            self._loads.pop(key, None)
+        self._entries[key] = _Entry(value, time.monotonic())
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> int:
+        """Drop one key, or every key; returns the number of entries removed."""
+        if key is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+        return 1 if self._entries.pop(key, None) is not None else 0
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        entries = {}
+        for key, entry in self._entries.items():
+            age = now - entry.loaded_at
+            entries[str(key)] = {
+                'age': round(age, 1),
+                'state': 'fresh' if age < self.ttl else 'stale' if age < self.ttl + self.stale_ttl else 'expired',
+                'size': len(entry.value) if hasattr(entry.value, '__len__') else None,
+                'loading': key in self._loads
+            }
+        return {
+            'ttl': self.ttl,
+            'stale_ttl': self.stale_ttl,
+            'entries': entries,
+            'loading': [str(key) for key in self._loads],
+            **self.counters
+        }
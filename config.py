@@ -10,6 +10,9 @@ RSS_FEEDS = [
 ]
 
 OUTPUT_FOLDER = 'output'
+# audio being downloaded is staged here, outside the /audio mount, and renamed into OUTPUT_FOLDER when complete
+AUDIO_TMP_FOLDER = OUTPUT_FOLDER + '.partial'
+AUDIO_CHUNK_SIZE = 64 * 1024
 ARTICLES_FILE = os.path.join(OUTPUT_FOLDER, 'articles.yaml')
 SUMMARIES_FILE = os.path.join(OUTPUT_FOLDER, 'summaries.yaml')
 ELEVEN_API_KEY = os.getenv("ELEVEN_API_KEY")
@@ -23,6 +26,148 @@ DEFAULT_NEETS_VOICE = "cardi-b"
 DEFAULT_ELEVENLABS_VOICE = "d39BbXcI33A814zijpKb"
 
 SUMMARIZER_MODEL = "openrouter/google/gemini-flash-1.5-8b"
+# provider endpoints; override to point at a proxy or at the local stubs in benchmarks/
+SUMMARIZER_API_BASE = os.getenv("SUMMARIZER_API_BASE")  # None: litellm's default for the model's provider
+ELEVENLABS_API_BASE = os.getenv("ELEVENLABS_API_BASE", "https://api.elevenlabs.io/v1")
+NEETS_API_BASE = os.getenv("NEETS_API_BASE", "https://api.neets.ai/v1")
+ELEVENLABS_MODEL = "eleven_multilingual_v2"
 
 SETTINGS_FILE = os.path.join(OUTPUT_FOLDER, 'settings.yaml')
 
+# processing pipeline: workers per stage and size of the queues between stages
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", 8))
+# short articles waiting in one summary batch each hold a worker, so allow at least SUMMARY_BATCH_MAX_ITEMS
+SUMMARIZE_WORKERS = int(os.getenv("SUMMARIZE_WORKERS", 8))
+NARRATE_WORKERS = int(os.getenv("NARRATE_WORKERS", 2))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 16))
+# pipeline results are written to the database in batches of this size, or after this many seconds
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", 25))
+DB_WRITE_MAX_DELAY = float(os.getenv("DB_WRITE_MAX_DELAY", 2.0))
+
+# shared HTTP client: connection pool, keep-alive, DNS cache and timeouts (seconds)
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 10))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", 120))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 60))
+
+# number of RSS feeds polled at the same time
+RSS_FETCH_CONCURRENCY = int(os.getenv("RSS_FETCH_CONCURRENCY", 8))
+
+# worker processes used to parse article html (0 parses in a thread instead)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", 2))
+
+# summary cache eviction limits
+SUMMARY_CACHE_MAX_AGE_DAYS = float(os.getenv("SUMMARY_CACHE_MAX_AGE_DAYS", 90))
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+# provider voice lists are cached this long, then served stale for up to VOICE_CACHE_STALE_TTL
+# more seconds while they are refreshed in the background
+VOICE_CACHE_TTL = float(os.getenv("VOICE_CACHE_TTL", 3600))
+VOICE_CACHE_STALE_TTL = float(os.getenv("VOICE_CACHE_STALE_TTL", 24 * 3600))
+
+# processing events pushed to clients on /events: events kept for resuming after a reconnect,
+# events queued per client before it is told to resync, and seconds between keep-alives
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", 2000))
+EVENT_SUBSCRIBER_QUEUE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE", 500))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", 15))
+
+# response compression: bodies smaller than this are sent as-is; gzip level and brotli quality
+# trade CPU for size (the library snapshot is compressed once per change, other bodies per request)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+# unreferenced audio blobs younger than this are kept by the garbage collector
+AUDIO_GC_GRACE_SECONDS = int(os.getenv("AUDIO_GC_GRACE_SECONDS", 3600))
+
+# sqlite connection tuning
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", 64 * 1024))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+# threads that run database calls for the event loop (see AsyncDatabase)
+DB_THREADS = int(os.getenv("DB_THREADS", 4))
+
+# known-url lookups: Bloom filter sizing and batch size of the confirming IN (...) query
+URL_FILTER_CAPACITY = int(os.getenv("URL_FILTER_CAPACITY", 100000))
+URL_FILTER_ERROR_RATE = float(os.getenv("URL_FILTER_ERROR_RATE", 0.01))
+URL_LOOKUP_BATCH_SIZE = 500
+
+# page sizes of the paginated /articles and /summaries endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# full-text search: bm25 weights for (title, content, summary), snippet length and highlight markers
+SEARCH_RANK_FUNCTION = "bm25(10.0, 1.0, 3.0)"
+SEARCH_SNIPPET_TOKENS = 24
+SEARCH_HIGHLIGHT = ("<mark>", "</mark>")  # the only markup in results; stored text is escaped
+
+# per-article jobs: retries with exponential backoff (seconds), then the job is marked failed.
+# Claims older than JOB_CLAIM_TIMEOUT belong to a crashed worker and can be taken over.
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", 60))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", 3600))
+JOB_CLAIM_TIMEOUT = float(os.getenv("JOB_CLAIM_TIMEOUT", 1800))
+JOB_CLAIM_LIMIT = int(os.getenv("JOB_CLAIM_LIMIT", 500))
+
+# summarization engine token budgets, counted with the summarizer model's tokenizer.
+# Articles longer than SUMMARY_CHUNK_TOKENS are summarized chunk by chunk and the parts reduced;
+# articles up to SUMMARY_SHORT_TOKENS are packed several to a request.
+SUMMARIZER_CONTEXT_TOKENS = int(os.getenv("SUMMARIZER_CONTEXT_TOKENS", 8192))  # used when litellm does not know the model
+SUMMARY_OUTPUT_TOKENS = int(os.getenv("SUMMARY_OUTPUT_TOKENS", 1024))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 6000))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 4))
+SUMMARY_SHORT_TOKENS = int(os.getenv("SUMMARY_SHORT_TOKENS", 400))
+SUMMARY_BATCH_MAX_ITEMS = int(os.getenv("SUMMARY_BATCH_MAX_ITEMS", 8))
+SUMMARY_BATCH_MAX_TOKENS = int(os.getenv("SUMMARY_BATCH_MAX_TOKENS", 3000))
+SUMMARY_BATCH_WAIT = float(os.getenv("SUMMARY_BATCH_WAIT", 0.5))
+
+# text to speech: summaries are split at sentence boundaries into chunks of at most this many
+# characters, synthesized concurrently (up to the provider's limit) and joined frame by frame
+TTS_CHUNK_CHARS = {
+    'elevenlabs': int(os.getenv("ELEVENLABS_CHUNK_CHARS", 800)),
+    'neets': int(os.getenv("NEETS_CHUNK_CHARS", 500))
+}
+TTS_CONCURRENCY = {
+    'elevenlabs': int(os.getenv("ELEVENLABS_CONCURRENCY", 2)),
+    'neets': int(os.getenv("NEETS_CONCURRENCY", 4))
+}
+# publish the first synthesized segment as a preview so playback can start before the whole narration is done
+TTS_PUBLISH_FIRST_SEGMENT = os.getenv("TTS_PUBLISH_FIRST_SEGMENT", "false").lower() in ("1", "true", "yes")
+
+# per-provider rate limits: requests and characters per minute (0 = unlimited) and the most calls
+# in flight at once. Concurrency shrinks on 429 responses and grows back as calls succeed.
+RATE_LIMITS = {
+    'openrouter': {
+        'requests_per_minute': float(os.getenv("OPENROUTER_REQUESTS_PER_MINUTE", 120)),
+        'chars_per_minute': float(os.getenv("OPENROUTER_CHARS_PER_MINUTE", 0)),
+        'max_concurrency': int(os.getenv("OPENROUTER_CONCURRENCY", 8))
+    },
+    'elevenlabs': {
+        'requests_per_minute': float(os.getenv("ELEVENLABS_REQUESTS_PER_MINUTE", 60)),
+        'chars_per_minute': float(os.getenv("ELEVENLABS_CHARS_PER_MINUTE", 0)),
+        'max_concurrency': TTS_CONCURRENCY['elevenlabs']
+    },
+    'neets': {
+        'requests_per_minute': float(os.getenv("NEETS_REQUESTS_PER_MINUTE", 60)),
+        'chars_per_minute': float(os.getenv("NEETS_CHARS_PER_MINUTE", 0)),
+        'max_concurrency': TTS_CONCURRENCY['neets']
+    },
+    # any other LLM provider
+    'default': {'requests_per_minute': 60, 'chars_per_minute': 0, 'max_concurrency': 4}
+}
+# retries of throttled (429) and transient (5xx, connection) failures, with exponential backoff in seconds
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", 4))
+RATE_LIMIT_BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", 1.0))
+RATE_LIMIT_BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", 60.0))
+
+# article fetching politeness: requests in flight overall and per host, minimum seconds between
+# requests to the same host, largest page read (bytes), per-request timeout and attempts per url
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", 16))
+FETCH_PER_HOST_CONCURRENCY = int(os.getenv("FETCH_PER_HOST_CONCURRENCY", 2))
+FETCH_HOST_DELAY = float(os.getenv("FETCH_HOST_DELAY", 0.5))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", 5 * 1024 * 1024))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", 30))
+FETCH_ATTEMPTS = int(os.getenv("FETCH_ATTEMPTS", 3))
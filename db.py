@@ -1,31 +1,129 @@
 import sqlite3
+import threading
+import asyncio
+import base64
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import datetime, date, timedelta, timezone, tzinfo
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
+import html
 import json
 from loguru import logger
+from bloom import BloomFilter
+from utils import to_utc, day_range
 from config import (
     DEFAULT_TTS_PROVIDER,
     DEFAULT_NEETS_VOICE,
     DEFAULT_NEETS_MODEL,
     DEFAULT_ELEVENLABS_VOICE,
     SUMMARIZER_MODEL,
-    RSS_FEEDS
+    RSS_FEEDS,
+    SQLITE_CACHE_KB,
+    SQLITE_MMAP_BYTES,
+    SQLITE_BUSY_TIMEOUT_MS,
+    DB_THREADS,
+    URL_FILTER_CAPACITY,
+    URL_FILTER_ERROR_RATE,
+    URL_LOOKUP_BATCH_SIZE,
+    SEARCH_RANK_FUNCTION,
+    SEARCH_SNIPPET_TOKENS,
+    SEARCH_HIGHLIGHT,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_DELAY,
+    JOB_RETRY_MAX_DELAY,
+    JOB_CLAIM_TIMEOUT
 )
 
+def _adapt_datetime(value: datetime) -> str:
+    # timestamps are stored as naive UTC so plain string comparisons line up with time order
+    if value.tzinfo is not None:
+        value = to_utc(value)
+    return value.isoformat(" ")
+
+def _convert_timestamp(value: bytes) -> datetime:
+    # also reads rows written before normalization, which may carry a UTC offset
+    parsed = datetime.fromisoformat(value.decode())
+    return to_utc(parsed) if parsed.tzinfo is not None else parsed
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+
+# job states in processing order; a job's state is the last stage it completed.
+# 'skipped' jobs were saved but turned down for summarizing (e.g. not today's news in the CLI)
+JOB_STATES = ('queued', 'fetched', 'summarized', 'narrated', 'done', 'skipped', 'failed')
+
+# search matches are marked with these private-use characters, then turned into
+# SEARCH_HIGHLIGHT tags once the stored text around them has been HTML-escaped
+_MATCH_START, _MATCH_END = "\ue000", "\ue001"
+
+def _highlight(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    start, end = SEARCH_HIGHLIGHT
+    return html.escape(text).replace(_MATCH_START, start).replace(_MATCH_END, end)
+
+# columns list endpoints can project
+ARTICLE_FIELDS = ('url', 'title', 'content', 'publish_date')
+SUMMARY_FIELDS = ('summary', 'audio_path')
+
 class Database:
     def __init__(self, db_path: str = "narrate_news.db"):
         self.db_path = db_path
+        # one long-lived connection per thread instead of a new one per call
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # in-memory Bloom filter of saved article urls, built on first use
+        self._url_filter: Optional[BloomFilter] = None
+        self._url_filter_lock = threading.Lock()
+        self.fts_enabled = False
         self.init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False  # only used by its own thread, but close() may run elsewhere
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL lets API readers run while the pipeline writes; NORMAL sync is safe under WAL
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+        conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
     @contextmanager
     def get_db(self):
-        conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        conn.row_factory = sqlite3.Row
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            self._local.depth = 0
+        self._local.depth += 1
         try:
             yield conn
         finally:
-            conn.close()
+            self._local.depth -= 1
+            # methods commit their own work; anything still open when the outermost
+            # caller is done was abandoned by an error
+            if self._local.depth == 0 and conn.in_transaction:
+                conn.rollback()
+
+    def close(self) -> None:
+        """Close every connection opened by this Database."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"Error closing database connection: {str(e)}")
+        self._local = threading.local()
 
     def init_db(self):
         """Initialize database with required tables and default settings."""
@@ -59,15 +157,240 @@ class Database:
                 )
             """)
 
+            # Feed state table - conditional GET validators and last poll result per feed
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_state (
+                    feed_url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    entry_ids TEXT NOT NULL DEFAULT '[]',
+                    status TEXT,
+                    http_status INTEGER,
+                    fetch_ms REAL,
+                    entries INTEGER DEFAULT 0,
+                    new_entries INTEGER DEFAULT 0,
+                    error TEXT,
+                    fetched_at TIMESTAMP
+                )
+            """)
+
+            # Summary cache - LLM output keyed by a hash of the article text, model and prompt version
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Jobs table - tracks each article through the pipeline so runs can resume after a crash
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    url TEXT PRIMARY KEY,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    failed_state TEXT,
+                    summary TEXT,
+                    audio_path TEXT,
+                    next_attempt_at TIMESTAMP,
+                    claimed_by TEXT,
+                    claimed_at TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Library version - a counter bumped by triggers on every write to articles or summaries,
+            # so readers can tell whether anything changed without reading those tables
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                INSERT OR IGNORE INTO meta (key, value, updated_at)
+                VALUES ('library_version', 0, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            """)
+            for table in ('articles', 'summaries'):
+                for event in ('INSERT', 'UPDATE', 'DELETE'):
+                    conn.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS {table}_version_after_{event.lower()} AFTER {event} ON {table} BEGIN
+                            UPDATE meta SET value = value + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                            WHERE key = 'library_version';
+                        END
+                    """)
+
             # Create indices for better performance
             conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_date ON articles(publish_date)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_created ON summaries(created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_cache_used ON summary_cache(last_used_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, next_attempt_at)")
+
+            # Older rows may carry a UTC offset; normalize them to naive UTC so range scans compare correctly
+            conn.execute("""
+                UPDATE articles SET publish_date = strftime('%Y-%m-%d %H:%M:%f', publish_date)
+                WHERE length(publish_date) > 19
+                  AND (publish_date LIKE '%Z' OR substr(publish_date, -6, 1) IN ('+', '-'))
+            """)
             
             conn.commit()
+
+        self.init_search_index()
         
         # Ensure default settings exist
         self.ensure_default_settings()
 
+    def init_search_index(self):
+        """Create the FTS5 index over article title, content and summary, kept in sync by triggers."""
+        with self.get_db() as conn:
+            try:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+                ).fetchone() is not None
+
+                # rows share their rowid with the articles table
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts
+                    USING fts5(title, content, summary, tokenize = 'porter unicode61')
+                """)
+                # INSERT OR REPLACE does not fire delete triggers, so drop the old index row up front
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS articles_fts_before_insert BEFORE INSERT ON articles BEGIN
+                        DELETE FROM articles_fts WHERE rowid = (SELECT rowid FROM articles WHERE url = new.url);
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS articles_fts_after_insert AFTER INSERT ON articles BEGIN
+                        INSERT INTO articles_fts (rowid, title, content, summary)
+                        VALUES (new.rowid, new.title, new.content,
+                                (SELECT summary FROM summaries WHERE article_url = new.url));
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS articles_fts_after_update AFTER UPDATE ON articles BEGIN
+                        UPDATE articles_fts SET title = new.title, content = new.content WHERE rowid = old.rowid;
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS articles_fts_after_delete AFTER DELETE ON articles BEGIN
+                        DELETE FROM articles_fts WHERE rowid = old.rowid;
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS summaries_fts_after_insert AFTER INSERT ON summaries BEGIN
+                        UPDATE articles_fts SET summary = new.summary
+                        WHERE rowid = (SELECT rowid FROM articles WHERE url = new.article_url);
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS summaries_fts_after_update AFTER UPDATE ON summaries BEGIN
+                        UPDATE articles_fts SET summary = new.summary
+                        WHERE rowid = (SELECT rowid FROM articles WHERE url = new.article_url);
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS summaries_fts_after_delete AFTER DELETE ON summaries BEGIN
+                        UPDATE articles_fts SET summary = NULL
+                        WHERE rowid = (SELECT rowid FROM articles WHERE url = old.article_url);
+                    END
+                """)
+                # rank by bm25 with title matches weighted above summary and body matches
+                conn.execute(
+                    "INSERT INTO articles_fts (articles_fts, rank) VALUES ('rank', ?)",
+                    (SEARCH_RANK_FUNCTION,)
+                )
+                conn.commit()
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                self.fts_enabled = False
+                logger.warning(f"Full-text search disabled, SQLite has no FTS5 support: {str(e)}")
+                return
+
+        if not exists:
+            # databases created before the index existed need a one-off backfill
+            self.rebuild_search_index()
+
+    def rebuild_search_index(self) -> int:
+        """Rebuild the full-text index from the articles and summaries tables."""
+        if not self.fts_enabled:
+            raise RuntimeError("Full-text search is not available")
+        with self.get_db() as conn:
+            try:
+                conn.execute("DELETE FROM articles_fts")
+                conn.execute("""
+                    INSERT INTO articles_fts (rowid, title, content, summary)
+                    SELECT a.rowid, a.title, a.content, s.summary
+                    FROM articles a
+                    LEFT JOIN summaries s ON a.url = s.article_url
+                """)
+                conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+                count = conn.execute("SELECT COUNT(*) FROM articles_fts").fetchone()[0]
+                conn.commit()
+                logger.info(f"Rebuilt search index with {count} articles")
+                return count
+            except Exception as e:
+                logger.error(f"Error rebuilding search index: {str(e)}")
+                raise
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn free text into an FTS5 query: every word must match, the last one as a prefix."""
+        terms = [term.replace('"', '""') for term in query.split()]
+        if not terms:
+            return ""
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, query: str, limit: int, offset: int = 0) -> Dict[str, Any]:
+        """Ranked full-text search over titles, article text and summaries, with highlighted snippets.
+
+        Highlights and snippets are HTML: the stored text is escaped and only the
+        SEARCH_HIGHLIGHT tags are markup, so clients can render them as-is.
+        """
+        if not self.fts_enabled:
+            raise RuntimeError("Full-text search is not available")
+        match = self._fts_query(query)
+        if not match:
+            return {'items': [], 'next_offset': None}
+        with self.get_db() as conn:
+            rows = conn.execute(f"""
+                SELECT
+                    a.url, a.title, a.publish_date, s.audio_path,
+                    highlight(articles_fts, 0, ?, ?) AS title_highlight,
+                    snippet(articles_fts, 1, ?, ?, '…', {SEARCH_SNIPPET_TOKENS}) AS content_snippet,
+                    snippet(articles_fts, 2, ?, ?, '…', {SEARCH_SNIPPET_TOKENS}) AS summary_snippet,
+                    articles_fts.rank AS score
+                FROM articles_fts
+                JOIN articles a ON a.rowid = articles_fts.rowid
+                LEFT JOIN summaries s ON a.url = s.article_url
+                WHERE articles_fts MATCH ?
+                ORDER BY articles_fts.rank
+                LIMIT ? OFFSET ?
+            """, ((_MATCH_START, _MATCH_END) * 3 + (match, limit + 1, offset))).fetchall()
+        items = [
+            {
+                'url': row['url'],
+                'title': row['title'],
+                'publish_date': row['publish_date'].isoformat(),
+                'audio_path': row['audio_path'],
+                'title_highlight': _highlight(row['title_highlight']),
+                'content_snippet': _highlight(row['content_snippet']),
+                'summary_snippet': _highlight(row['summary_snippet']),
+                'score': row['score']
+            }
+            for row in rows[:limit]
+        ]
+        return {'items': items, 'next_offset': offset + limit if len(rows) > limit else None}
+
     def ensure_default_settings(self):
         """Ensure default settings exist in database."""
         try:
@@ -89,117 +412,682 @@ class Database:
             logger.error(f"Error ensuring default settings: {str(e)}")
             raise
 
+    @staticmethod
+    def _article_row(article_dict: Dict[str, Any]) -> tuple:
+        # Convert ISO format string to datetime if needed, stored as naive UTC
+        publish_date = article_dict['publish_date']
+        if isinstance(publish_date, str):
+            publish_date = datetime.fromisoformat(publish_date.replace('Z', '+00:00'))
+        publish_date = to_utc(publish_date)
+        return (
+            article_dict['url'],
+            article_dict['title'],
+            article_dict['content'],
+            publish_date
+        )
+
+    def _write_articles(self, conn: sqlite3.Connection, articles: Iterable[Dict[str, Any]]) -> None:
+        rows = [self._article_row(article) for article in articles]
+        conn.executemany("""
+            INSERT OR REPLACE INTO articles (url, title, content, publish_date)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+        # a url added for a write that is later rolled back is only a false positive
+        self._remember_urls(row[0] for row in rows)
+
+    def _load_url_filter(self) -> BloomFilter:
+        with self.get_db() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            url_filter = BloomFilter(max(URL_FILTER_CAPACITY, count * 2), URL_FILTER_ERROR_RATE)
+            for row in conn.execute("SELECT url FROM articles"):
+                url_filter.add(row[0])
+        logger.info(f"Loaded {count} article urls into the url filter")
+        return url_filter
+
+    def _remember_urls(self, urls: Iterable[str]) -> None:
+        with self._url_filter_lock:
+            if self._url_filter is None:
+                return
+            urls = list(urls)
+            for url in urls:
+                self._url_filter.add(url)
+            if self._url_filter.full:
+                # past capacity the error rate climbs, rebuild with room to grow
+                self._url_filter = self._load_url_filter()
+                for url in urls:
+                    self._url_filter.add(url)
+
+    def get_known_urls(self, urls: Iterable[str]) -> set:
+        """Return which of the given urls are already saved as articles.
+
+        Urls the Bloom filter has never seen are answered from memory; only
+        possible matches are confirmed with a batched primary key lookup.
+        """
+        with self._url_filter_lock:
+            if self._url_filter is None:
+                self._url_filter = self._load_url_filter()
+            candidates = [url for url in set(urls) if url in self._url_filter]
+
+        known = set()
+        with self.get_db() as conn:
+            for i in range(0, len(candidates), URL_LOOKUP_BATCH_SIZE):
+                batch = candidates[i:i + URL_LOOKUP_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                cursor = conn.execute(f"SELECT url FROM articles WHERE url IN ({placeholders})", batch)
+                known.update(row[0] for row in cursor.fetchall())
+        return known
+
+    def filter_new_urls(self, urls: Iterable[str]) -> List[str]:
+        """Return the urls not saved as articles yet, deduplicated and in their original order."""
+        urls = list(dict.fromkeys(urls))
+        known = self.get_known_urls(urls)
+        return [url for url in urls if url not in known]
+
+    def _write_summaries(self, conn: sqlite3.Connection, summaries: Dict[str, Dict[str, Any]]) -> None:
+        conn.executemany("""
+            INSERT OR REPLACE INTO summaries (article_url, summary, audio_path)
+            VALUES (?, ?, ?)
+        """, [
+            (url, summary_dict['summary'], summary_dict['audio_path'])
+            for url, summary_dict in summaries.items()
+        ])
+
+    def _write_settings(self, conn: sqlite3.Connection, settings_dict: Dict[str, Any]) -> None:
+        # Convert lists and complex types to JSON strings
+        conn.executemany("""
+            INSERT OR REPLACE INTO settings (key, value)
+            VALUES (?, ?)
+        """, [
+            (str(key), json.dumps(value) if isinstance(value, (list, dict)) else str(value))
+            for key, value in settings_dict.items()
+        ])
+
     def save_article(self, article_dict: Dict[str, Any]) -> None:
         """Save article to database."""
+        self.save_articles([article_dict])
+
+    def save_articles(self, articles: List[Dict[str, Any]]) -> None:
+        """Save several articles in a single transaction."""
         with self.get_db() as conn:
             try:
-                # Convert ISO format string to datetime if needed
-                publish_date = article_dict['publish_date']
-                if isinstance(publish_date, str):
-                    publish_date = datetime.fromisoformat(publish_date.replace('Z', '+00:00'))
-
-                conn.execute("""
-                    INSERT OR REPLACE INTO articles (url, title, content, publish_date)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    article_dict['url'],
-                    article_dict['title'],
-                    article_dict['content'],
-                    publish_date
-                ))
-                conn.commit()  # Ensure immediate commit
+                self._write_articles(conn, articles)
+                conn.commit()
             except Exception as e:
-                logger.error(f"Error saving article {article_dict.get('url')}: {str(e)}")
+                logger.error(f"Error saving {len(articles)} articles: {str(e)}")
                 raise
 
     def save_summary(self, url: str, summary_dict: Dict[str, Any]) -> None:
         """Save summary to database."""
+        self.save_summaries({url: summary_dict})
+
+    def save_summaries(self, summaries: Dict[str, Dict[str, Any]]) -> None:
+        """Save several summaries, keyed by article url, in a single transaction."""
         with self.get_db() as conn:
             try:
-                conn.execute("""
-                    INSERT OR REPLACE INTO summaries (article_url, summary, audio_path)
-                    VALUES (?, ?, ?)
-                """, (
-                    url,
-                    summary_dict['summary'],
-                    summary_dict['audio_path']
-                ))
+                self._write_summaries(conn, summaries)
                 conn.commit()
             except Exception as e:
-                logger.error(f"Error saving summary for {url}: {str(e)}")
+                logger.error(f"Error saving {len(summaries)} summaries: {str(e)}")
                 raise
 
     def save_settings(self, settings_dict: Dict[str, Any]) -> None:
-        """Save settings to database."""
+        """Save settings to database in a single transaction."""
         with self.get_db() as conn:
             try:
-                # Convert lists and complex types to JSON strings
-                for key, value in settings_dict.items():
-                    if isinstance(value, (list, dict)):
-                        value = json.dumps(value)
-                    conn.execute("""
-                        INSERT OR REPLACE INTO settings (key, value)
-                        VALUES (?, ?)
-                    """, (str(key), str(value)))
+                self._write_settings(conn, settings_dict)
                 conn.commit()
             except Exception as e:
                 logger.error(f"Error saving settings: {str(e)}")
                 raise
 
-    def get_articles(self, filter_date: Optional[datetime] = None) -> Dict[str, Any]:
-        """Get articles, optionally filtered by date."""
+    @staticmethod
+    def articles_query(filter_date: Optional[date] = None, date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None, tz: tzinfo = timezone.utc,
+                       columns: Iterable[str] = ARTICLE_FIELDS) -> tuple:
+        """Build the SQL and parameters get_articles runs for the given date restriction."""
+        # bounds as naive UTC, matching how publish_date is stored
+        if filter_date is not None:
+            if isinstance(filter_date, datetime):
+                filter_date = filter_date.date()
+            start, end = day_range(filter_date, tz)
+        else:
+            start = to_utc(date_from, tz) if date_from is not None else None
+            end = to_utc(date_to, tz) if date_to is not None else None
+
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("publish_date >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("publish_date < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"SELECT {', '.join(columns)} FROM articles {where} ORDER BY publish_date DESC", params
+
+    def get_articles(self, filter_date: Optional[date] = None, date_from: Optional[datetime] = None,
+                     date_to: Optional[datetime] = None, tz: tzinfo = timezone.utc,
+                     fields: Optional[Iterable[str]] = None, raise_errors: bool = False) -> Dict[str, Any]:
+        """Get articles, optionally restricted to a calendar day or a [date_from, date_to) range.
+
+        Days and naive datetimes are interpreted in `tz`. The bounds become a plain
+        range on publish_date, so the query walks idx_articles_date. `fields` limits
+        the columns read and returned (url is always included). Errors give an
+        empty result unless `raise_errors` is set.
+        """
+        fields = self._parse_fields(fields, ARTICLE_FIELDS)
+        sql, params = self.articles_query(filter_date, date_from, date_to, tz,
+                                          columns=['url'] + [field for field in fields if field != 'url'])
         with self.get_db() as conn:
             try:
-                if filter_date:
-                    cursor = conn.execute("""
-                        SELECT * FROM articles 
-                        WHERE DATE(publish_date) = DATE(?)
-                        ORDER BY publish_date DESC
-                    """, (filter_date.isoformat(),))
-                else:
-                    cursor = conn.execute("SELECT * FROM articles ORDER BY publish_date DESC")
-                
-                return {
-                    row['url']: {
-                        'url': row['url'],
-                        'title': row['title'],
-                        'content': row['content'],
-                        'publish_date': row['publish_date'].isoformat()
-                    }
-                    for row in cursor.fetchall()
-                }
+                cursor = conn.execute(sql, params)
+                return {row['url']: self._article_fields(row, fields) for row in cursor.fetchall()}
             except Exception as e:
                 logger.error(f"Error fetching articles: {str(e)}")
+                if raise_errors:
+                    raise
                 return {}
 
-    def get_summaries(self) -> Dict[str, Any]:
-        """Get all summaries with their associated articles."""
+    def get_unsummarized_urls(self, filter_date: Optional[date] = None, date_from: Optional[datetime] = None,
+                              date_to: Optional[datetime] = None, tz: tzinfo = timezone.utc) -> List[str]:
+        """Urls of articles in the range get_articles would return that have no summary yet.
+
+        An anti-join on the summaries primary key: no article or summary bodies are read.
+        """
+        sql, params = self.articles_query(filter_date, date_from, date_to, tz, columns=['url'])
         with self.get_db() as conn:
             try:
-                cursor = conn.execute("""
-                    SELECT 
-                        a.url, a.title, a.content, a.publish_date,
-                        s.summary, s.audio_path
+                cursor = conn.execute(f"""
+                    SELECT url FROM ({sql}) AS a
+                    WHERE NOT EXISTS (SELECT 1 FROM summaries s WHERE s.article_url = a.url)
+                """, params)
+                return [row['url'] for row in cursor.fetchall()]
+            except Exception as e:
+                logger.error(f"Error fetching unsummarized articles: {str(e)}")
+                raise
+
+    def get_summaries(self, fields: Optional[Iterable[str]] = None, raise_errors: bool = False) -> Dict[str, Any]:
+        """Get all summaries with their associated articles.
+
+        `fields` limits the columns read and returned, as for get_summaries_page.
+        Errors give an empty result unless `raise_errors` is set.
+        """
+        fields = self._parse_fields(fields, ARTICLE_FIELDS + SUMMARY_FIELDS)
+        columns = ["a.url"]
+        columns += [f"a.{field}" for field in fields if field in ARTICLE_FIELDS and field != 'url']
+        columns += [f"s.{field}" for field in fields if field in SUMMARY_FIELDS]
+        with self.get_db() as conn:
+            try:
+                cursor = conn.execute(f"""
+                    SELECT {', '.join(columns)}
                     FROM articles a
                     JOIN summaries s ON a.url = s.article_url
                     ORDER BY a.publish_date DESC
                 """)
-                
+                summaries = {}
+                for row in cursor.fetchall():
+                    item = {'article': self._article_fields(row, fields)}
+                    for field in fields:
+                        if field in SUMMARY_FIELDS:
+                            item[field] = row[field]
+                    summaries[row['url']] = item
+                return summaries
+            except Exception as e:
+                logger.error(f"Error fetching summaries: {str(e)}")
+                if raise_errors:
+                    raise
+                return {}
+
+    def get_library_version(self) -> Tuple[int, datetime]:
+        """The articles/summaries change counter and the time of the last change (naive UTC)."""
+        with self.get_db() as conn:
+            row = conn.execute("SELECT value, updated_at FROM meta WHERE key = 'library_version'").fetchone()
+        return row['value'], row['updated_at']
+
+    @staticmethod
+    def encode_cursor(sort_date: str, url: str) -> str:
+        """Opaque keyset cursor pointing just past (publish_date, url)."""
+        return base64.urlsafe_b64encode(json.dumps([sort_date, url]).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        try:
+            sort_date, url = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return str(sort_date), str(url)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _parse_fields(fields: Optional[Iterable[str]], allowed: tuple) -> List[str]:
+        if fields is None:
+            return list(allowed)
+        fields = [field for field in fields if field]
+        unknown = set(fields) - set(allowed)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return [field for field in allowed if field in fields]
+
+    def page_query(self, fields: List[str], join_summaries: bool, limit: int, cursor: Optional[str]) -> tuple:
+        """Build the keyset SQL and parameters _fetch_page runs for one page."""
+        columns = ["a.url", "a.publish_date || '' AS sort_date"]
+        columns += [f"a.{field}" for field in fields if field in ARTICLE_FIELDS and field != 'url']
+        columns += [f"s.{field}" for field in fields if field in SUMMARY_FIELDS]
+        sql = f"SELECT {', '.join(columns)} FROM articles a"
+        if join_summaries:
+            sql += " JOIN summaries s ON a.url = s.article_url"
+        params: List[Any] = []
+        if cursor:
+            sql += " WHERE (a.publish_date, a.url) < (?, ?)"
+            params.extend(self.decode_cursor(cursor))
+        sql += " ORDER BY a.publish_date DESC, a.url DESC LIMIT ?"
+        # one extra row tells us whether there is a next page
+        params.append(limit + 1)
+        return sql, params
+
+    def _fetch_page(self, fields: List[str], join_summaries: bool, limit: int, cursor: Optional[str]) -> tuple:
+        """Keyset page over articles ordered by (publish_date, url) descending, walking idx_articles_date."""
+        sql, params = self.page_query(fields, join_summaries, limit, cursor)
+        with self.get_db() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1]['sort_date'], rows[-1]['url'])
+        return rows, next_cursor
+
+    @staticmethod
+    def _article_fields(row: sqlite3.Row, fields: List[str]) -> Dict[str, Any]:
+        article = {'url': row['url']}
+        for field in fields:
+            if field in ARTICLE_FIELDS and field != 'url':
+                article[field] = row[field].isoformat() if field == 'publish_date' else row[field]
+        return article
+
+    def get_articles_page(self, limit: int, cursor: Optional[str] = None,
+                          fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Get one page of articles, newest first, with only the requested fields."""
+        fields = self._parse_fields(fields, ARTICLE_FIELDS)
+        rows, next_cursor = self._fetch_page(fields, False, limit, cursor)
+        return {
+            'items': [self._article_fields(row, fields) for row in rows],
+            'next_cursor': next_cursor
+        }
+
+    def get_summaries_page(self, limit: int, cursor: Optional[str] = None,
+                           fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Get one page of summaries with their articles, newest first, with only the requested fields."""
+        fields = self._parse_fields(fields, ARTICLE_FIELDS + SUMMARY_FIELDS)
+        rows, next_cursor = self._fetch_page(fields, True, limit, cursor)
+        items = []
+        for row in rows:
+            item = {'article': self._article_fields(row, fields)}
+            for field in fields:
+                if field in SUMMARY_FIELDS:
+                    item[field] = row[field]
+            items.append(item)
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def get_article(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get a single article with its summary, if it has one."""
+        with self.get_db() as conn:
+            row = conn.execute("""
+                SELECT
+                    a.url, a.title, a.content, a.publish_date,
+                    s.summary, s.audio_path
+                FROM articles a
+                LEFT JOIN summaries s ON a.url = s.article_url
+                WHERE a.url = ?
+            """, (url,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'article': {
+                'url': row['url'],
+                'title': row['title'],
+                'content': row['content'],
+                'publish_date': row['publish_date'].isoformat()
+            },
+            'summary': row['summary'],
+            'audio_path': row['audio_path']
+        }
+
+    def save_feed_state(self, feed_url: str, state: Dict[str, Any]) -> None:
+        """Save the validators and last poll result of a feed."""
+        with self.get_db() as conn:
+            try:
+                conn.execute("""
+                    INSERT OR REPLACE INTO feed_state (
+                        feed_url, etag, last_modified, entry_ids, status, http_status,
+                        fetch_ms, entries, new_entries, error, fetched_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    feed_url,
+                    state.get('etag'),
+                    state.get('last_modified'),
+                    json.dumps(state.get('entry_ids', [])),
+                    state.get('status'),
+                    state.get('http_status'),
+                    state.get('fetch_ms'),
+                    state.get('entries', 0),
+                    state.get('new_entries', 0),
+                    state.get('error'),
+                    state.get('fetched_at') or datetime.now()
+                ))
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Error saving feed state for {feed_url}: {str(e)}")
+                raise
+
+    def get_feed_states(self) -> Dict[str, Any]:
+        """Get the stored state of every polled feed."""
+        with self.get_db() as conn:
+            try:
+                cursor = conn.execute("SELECT * FROM feed_state")
                 return {
-                    row['url']: {
-                        'article': {
-                            'url': row['url'],
-                            'title': row['title'],
-                            'content': row['content'],
-                            'publish_date': row['publish_date'].isoformat()
-                        },
-                        'summary': row['summary'],
-                        'audio_path': row['audio_path']
+                    row['feed_url']: {
+                        'feed_url': row['feed_url'],
+                        'etag': row['etag'],
+                        'last_modified': row['last_modified'],
+                        'entry_ids': json.loads(row['entry_ids']),
+                        'status': row['status'],
+                        'http_status': row['http_status'],
+                        'fetch_ms': row['fetch_ms'],
+                        'entries': row['entries'],
+                        'new_entries': row['new_entries'],
+                        'error': row['error'],
+                        'fetched_at': row['fetched_at'].isoformat() if row['fetched_at'] else None
                     }
                     for row in cursor.fetchall()
                 }
             except Exception as e:
-                logger.error(f"Error fetching summaries: {str(e)}")
+                logger.error(f"Error fetching feed states: {str(e)}")
+                return {}
+
+    def get_cached_summary(self, key: str) -> Optional[str]:
+        """Get a cached summary by cache key and mark it as recently used."""
+        with self.get_db() as conn:
+            try:
+                row = conn.execute("SELECT summary FROM summary_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE summary_cache SET last_used_at = ? WHERE key = ?", (datetime.now(), key))
+                conn.commit()
+                return row['summary']
+            except Exception as e:
+                logger.error(f"Error reading summary cache: {str(e)}")
+                return None
+
+    def save_cached_summary(self, key: str, model: str, prompt_version: str, summary: str) -> None:
+        """Store a summary in the summary cache."""
+        with self.get_db() as conn:
+            try:
+                now = datetime.now()
+                conn.execute("""
+                    INSERT OR REPLACE INTO summary_cache (key, model, prompt_version, summary, size, created_at, last_used_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (key, model, prompt_version, summary, len(summary.encode('utf-8')), now, now))
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Error saving to summary cache: {str(e)}")
+                raise
+
+    def evict_summary_cache(self, max_age_days: Optional[float] = None, max_bytes: Optional[int] = None) -> int:
+        """Drop cache entries older than max_age_days, then least recently used ones above max_bytes."""
+        with self.get_db() as conn:
+            try:
+                removed = 0
+                if max_age_days is not None:
+                    cutoff = datetime.now() - timedelta(days=max_age_days)
+                    removed += conn.execute("DELETE FROM summary_cache WHERE created_at < ?", (cutoff,)).rowcount
+                if max_bytes is not None:
+                    removed += conn.execute("""
+                        DELETE FROM summary_cache WHERE key IN (
+                            SELECT key FROM (
+                                SELECT key, SUM(size) OVER (ORDER BY last_used_at DESC, key) AS total
+                                FROM summary_cache
+                            )
+                            WHERE total > ?
+                        )
+                    """, (max_bytes,)).rowcount
+                conn.commit()
+                return removed
+            except Exception as e:
+                logger.error(f"Error evicting summary cache: {str(e)}")
+                raise
+
+    def get_summary_cache_size(self) -> Dict[str, int]:
+        """Get the number of entries and total bytes in the summary cache."""
+        with self.get_db() as conn:
+            try:
+                row = conn.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes FROM summary_cache").fetchone()
+                return {'entries': row['entries'], 'bytes': row['bytes']}
+            except Exception as e:
+                logger.error(f"Error reading summary cache size: {str(e)}")
+                return {'entries': 0, 'bytes': 0}
+
+    def get_audio_paths(self) -> set:
+        """Get every audio path referenced by a summary or by an unfinished job."""
+        with self.get_db() as conn:
+            cursor = conn.execute("""
+                SELECT audio_path FROM summaries
+                UNION
+                SELECT audio_path FROM jobs WHERE audio_path IS NOT NULL
+            """)
+            return {row['audio_path'] for row in cursor.fetchall()}
+
+    def enqueue_jobs(self, urls: Iterable[str], state: str = 'queued') -> int:
+        """Create a job for every url that does not have one yet. Returns the number created."""
+        if state not in JOB_STATES:
+            raise ValueError(f"Unknown job state: {state}")
+        with self.get_db() as conn:
+            try:
+                now = datetime.now()
+                cursor = conn.executemany("""
+                    INSERT OR IGNORE INTO jobs (url, state, created_at, updated_at)
+                    VALUES (?, ?, ?, ?)
+                """, ((url, state, now, now) for url in urls))
+                conn.commit()
+                return cursor.rowcount
+            except Exception as e:
+                logger.error(f"Error enqueueing jobs: {str(e)}")
+                raise
+
+    def claim_jobs(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Atomically claim up to `limit` runnable jobs for `worker_id`.
+
+        A job is runnable when it is unfinished, its retry delay has passed and
+        it is either unclaimed or its claim is older than JOB_CLAIM_TIMEOUT.
+        The select and the claim happen in one UPDATE, so two workers never
+        get the same job.
+        """
+        now = datetime.now()
+        with self.get_db() as conn:
+            try:
+                rows = conn.execute("""
+                    UPDATE jobs SET claimed_by = ?, claimed_at = ?
+                    WHERE url IN (
+                        SELECT url FROM jobs
+                        WHERE state NOT IN ('done', 'skipped', 'failed')
+                          AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+                          AND (claimed_by IS NULL OR claimed_at < ?)
+                        ORDER BY created_at, url
+                        LIMIT ?
+                    )
+                    RETURNING url, state, attempts, summary, audio_path
+                """, (worker_id, now, now, now - timedelta(seconds=JOB_CLAIM_TIMEOUT), limit)).fetchall()
+                conn.commit()
+                return [dict(row) for row in rows]
+            except Exception as e:
+                logger.error(f"Error claiming jobs: {str(e)}")
+                raise
+
+    def advance_job(self, url: str, state: str, summary: Optional[str] = None,
+                    audio_path: Optional[str] = None) -> None:
+        """Record that a job completed the stage leading to `state`, keeping its output."""
+        self.advance_jobs([url], state, summary=summary, audio_path=audio_path)
+
+    def advance_jobs(self, urls: Iterable[str], state: str, summary: Optional[str] = None,
+                     audio_path: Optional[str] = None) -> None:
+        """Move jobs to `state` and reset their attempt counter for the next stage."""
+        if state not in JOB_STATES:
+            raise ValueError(f"Unknown job state: {state}")
+        with self.get_db() as conn:
+            try:
+                now = datetime.now()
+                conn.executemany("""
+                    UPDATE jobs SET
+                        state = ?,
+                        summary = COALESCE(?, summary),
+                        audio_path = COALESCE(?, audio_path),
+                        attempts = 0,
+                        last_error = NULL,
+                        next_attempt_at = NULL,
+                        updated_at = ?
+                    WHERE url = ?
+                """, ((state, summary, audio_path, now, url) for url in urls))
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Error advancing jobs to {state}: {str(e)}")
+                raise
+
+    def complete_jobs(self, urls: Iterable[str]) -> None:
+        """Mark jobs done once their summary row is saved; the copies kept on the job are dropped."""
+        with self.get_db() as conn:
+            try:
+                now = datetime.now()
+                conn.executemany("""
+                    UPDATE jobs SET
+                        state = 'done',
+                        summary = NULL,
+                        audio_path = NULL,
+                        attempts = 0,
+                        last_error = NULL,
+                        next_attempt_at = NULL,
+                        claimed_by = NULL,
+                        claimed_at = NULL,
+                        updated_at = ?
+                    WHERE url = ?
+                """, ((now, url) for url in urls))
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Error completing jobs: {str(e)}")
+                raise
+
+    def fail_job(self, url: str, error: str) -> None:
+        """Record a failed attempt: schedule a retry with exponential backoff, or give up.
+
+        The job keeps its state, so the retry starts at the stage that failed.
+        After JOB_MAX_ATTEMPTS the job becomes 'failed' and remembers the state
+        it was in, so retry_failed_jobs can put it back.
+        """
+        with self.get_db() as conn:
+            try:
+                row = conn.execute("SELECT attempts FROM jobs WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    return
+                attempts = row['attempts'] + 1
+                now = datetime.now()
+                if attempts >= JOB_MAX_ATTEMPTS:
+                    conn.execute("""
+                        UPDATE jobs SET
+                            failed_state = state,
+                            state = 'failed',
+                            attempts = ?,
+                            last_error = ?,
+                            next_attempt_at = NULL,
+                            claimed_by = NULL,
+                            claimed_at = NULL,
+                            updated_at = ?
+                        WHERE url = ?
+                    """, (attempts, error, now, url))
+                else:
+                    delay = min(JOB_RETRY_MAX_DELAY, JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+                    conn.execute("""
+                        UPDATE jobs SET
+                            attempts = ?,
+                            last_error = ?,
+                            next_attempt_at = ?,
+                            claimed_by = NULL,
+                            claimed_at = NULL,
+                            updated_at = ?
+                        WHERE url = ?
+                    """, (attempts, error, now + timedelta(seconds=delay), now, url))
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Error recording failure of job {url}: {str(e)}")
+                raise
+
+    def release_jobs(self, worker_id: str) -> int:
+        """Drop every claim held by `worker_id`, e.g. for jobs a cancelled run never reached."""
+        with self.get_db() as conn:
+            try:
+                cursor = conn.execute(
+                    "UPDATE jobs SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?",
+                    (worker_id,)
+                )
+                conn.commit()
+                return cursor.rowcount
+            except Exception as e:
+                logger.error(f"Error releasing jobs of {worker_id}: {str(e)}")
+                raise
+
+    def retry_failed_jobs(self, urls: Optional[Iterable[str]] = None) -> int:
+        """Put failed jobs (all, or just `urls`) back at the stage they failed in."""
+        with self.get_db() as conn:
+            try:
+                sql = """
+                    UPDATE jobs SET
+                        state = COALESCE(failed_state, 'queued'),
+                        failed_state = NULL,
+                        attempts = 0,
+                        next_attempt_at = NULL,
+                        updated_at = ?
+                    WHERE state = 'failed'
+                """
+                params: List[Any] = [datetime.now()]
+                if urls is not None:
+                    urls = list(urls)
+                    sql += f" AND url IN ({', '.join('?' * len(urls))})"
+                    params.extend(urls)
+                cursor = conn.execute(sql, params)
+                conn.commit()
+                return cursor.rowcount
+            except Exception as e:
+                logger.error(f"Error retrying failed jobs: {str(e)}")
+                raise
+
+    def get_job_stats(self, failed_limit: int = 50) -> Dict[str, Any]:
+        """Get the number of jobs per state and the most recent failures."""
+        with self.get_db() as conn:
+            try:
+                counts = {state: 0 for state in JOB_STATES}
+                for row in conn.execute("SELECT state, COUNT(*) AS count FROM jobs GROUP BY state"):
+                    counts[row['state']] = row['count']
+                failed = conn.execute("""
+                    SELECT url, failed_state, attempts, last_error, updated_at
+                    FROM jobs WHERE state = 'failed'
+                    ORDER BY updated_at DESC LIMIT ?
+                """, (failed_limit,)).fetchall()
+                retrying = conn.execute("""
+                    SELECT COUNT(*) AS count FROM jobs
+                    WHERE state NOT IN ('done', 'skipped', 'failed') AND next_attempt_at IS NOT NULL
+                """).fetchone()['count']
+                return {
+                    'counts': counts,
+                    'retrying': retrying,
+                    'failed': [
+                        {
+                            'url': row['url'],
+                            'failed_state': row['failed_state'],
+                            'attempts': row['attempts'],
+                            'last_error': row['last_error'],
+                            'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None
+                        }
+                        for row in failed
+                    ]
+                }
+            except Exception as e:
+                logger.error(f"Error reading job stats: {str(e)}")
                 return {}
 
     def get_settings(self) -> Dict[str, Any]:
@@ -226,28 +1114,64 @@ class Database:
         """Migrate data from YAML files to SQLite database."""
         with self.get_db() as conn:
             try:
-                # Start transaction
-                conn.execute("BEGIN TRANSACTION")
-                
-                # Migrate articles
-                for url, article in articles_yaml.items():
-                    self.save_article(article)
-                
-                # Migrate summaries
-                for url, summary in summaries_yaml.items():
-                    self.save_summary(url, summary)
-                
-                # Migrate settings
-                self.save_settings(settings_yaml)
-                
-                # Commit transaction
+                # Everything is written in one transaction and committed once
+                self._write_articles(conn, articles_yaml.values())
+                self._write_summaries(conn, summaries_yaml)
+                self._write_settings(conn, settings_yaml)
                 conn.commit()
-                logger.info("Successfully migrated data from YAML to SQLite")
+                logger.info(
+                    f"Successfully migrated {len(articles_yaml)} articles and "
+                    f"{len(summaries_yaml)} summaries from YAML to SQLite"
+                )
             except Exception as e:
                 conn.rollback()
                 logger.error(f"Error during migration: {str(e)}")
                 raise
 
+class AsyncDatabase:
+    """Awaitable front for a Database, for code running on the event loop.
+
+    Every public Database method is available under the same name as a
+    coroutine that runs the call on a small dedicated thread pool, so SQLite
+    I/O and building large result dicts never block the loop. Each pool
+    thread keeps its own connection and WAL lets reads run next to a write.
+    Calls awaited one after the other are applied in that order. The
+    wrapped Database is available as `sync` for code that is already off
+    the loop.
+    """
+
+    # not wrapped: connection handling stays on the calling thread
+    _SYNC_ONLY = ('get_db', 'init_db', 'init_search_index')
+
+    def __init__(self, db: Optional[Database] = None, max_workers: int = DB_THREADS):
+        self.sync = db if db is not None else Database()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="db")
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on the database threads, e.g. a helper that takes `self.sync`."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'sync':  # not set yet, e.g. while unpickling
+            raise AttributeError(name)
+        attr = getattr(self.sync, name)
+        if name.startswith('_') or name in self._SYNC_ONLY or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        # cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+    def close(self) -> None:
+        """Wait for running calls, stop the threads and close every connection."""
+        self._executor.shutdown(wait=True)
+        self.sync.close()
+
 def create_migration_script():
     """Create a migration script to move from YAML to SQLite."""
     from utils import load_from_yaml
@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+from config import EVENT_BUFFER_SIZE, EVENT_SUBSCRIBER_QUEUE
+
+class EventBus:
+    """Processing events (run start/finish, article stage changes, new summaries) for push clients.
+
+    Every event gets the next sequence number and an id of the form
+    '<boot id>-<seq>'. The last `size` events are kept in a ring buffer, so
+    a client that reconnects with the id of the last event it saw receives
+    everything after it. An id from before a restart, or one that has
+    dropped out of the buffer, gets a `resync` event instead: the client
+    should reload the full library. A client that falls more than
+    `queue_size` events behind is told to resync too, rather than slowing
+    down publishers.
+
+    publish() must be called from the event loop thread.
+    """
+
+    def __init__(self, size: int = EVENT_BUFFER_SIZE, queue_size: int = EVENT_SUBSCRIBER_QUEUE):
+        self.boot_id = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.queue_size = queue_size
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.counters = {'published': 0, 'resyncs': 0, 'overflows': 0}
+
+    def _event(self, type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': f"{self.boot_id}-{self.seq}",
+            'seq': self.seq,
+            'type': type,
+            'time': datetime.now(timezone.utc).isoformat(),
+            'data': data
+        }
+
+    def publish(self, type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self.seq += 1
+        self.counters['published'] += 1
+        event = self._event(type, data)
+        self._buffer.append(event)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # the client can't keep up: drop its backlog and have it reload instead
+                self.counters['overflows'] += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._resync("client fell behind"))
+        return event
+
+    def _resync(self, reason: str) -> Dict[str, Any]:
+        self.counters['resyncs'] += 1
+        return self._event('resync', {'reason': reason})
+
+    def replay(self, since: str) -> Optional[List[Dict[str, Any]]]:
+        """Buffered events after the event id `since`, or None if they are not all available."""
+        boot_id, _, seq = since.rpartition('-')
+        if boot_id != self.boot_id or not seq.isdigit() or int(seq) > self.seq:
+            return None
+        seq = int(seq)
+        oldest = self._buffer[0]['seq'] if self._buffer else self.seq + 1
+        if seq < oldest - 1:
+            return None
+        return [event for event in self._buffer if event['seq'] > seq]
+
+    async def subscribe(self, since: Optional[str] = None,
+                        heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield events as they are published, starting after the event id `since`.
+
+        Without `since` the first event is `ready`, carrying the current id:
+        load the library after it arrives and nothing published in between
+        is missed. With `heartbeat`, None is yielded after that many seconds
+        without events, so the caller can send a keep-alive.
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        # registering and replaying happen without a pause in between, so no event is missed or repeated
+        self._subscribers.add(queue)
+        try:
+            if since is None:
+                yield self._event('ready', {'boot_id': self.boot_id})
+            else:
+                backlog = self.replay(since)
+                if backlog is None:
+                    reason = "cursor too old" if since.startswith(f"{self.boot_id}-") else "unknown cursor or server restarted"
+                    yield self._resync(reason)
+                else:
+                    for event in backlog:
+                        yield event
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._subscribers.discard(queue)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'boot_id': self.boot_id,
+            'last_id': f"{self.boot_id}-{self.seq}",
+            'buffered': len(self._buffer),
+            'oldest_id': self._buffer[0]['id'] if self._buffer else None,
+            'subscribers': len(self._subscribers),
+            **self.counters
+        }
+
+# shared by the pipeline, the scheduler and the /events endpoint
+event_bus = EventBus()
@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+import orjson
+from fastapi import Request, Response
+from loguru import logger
+from metrics import CACHE_REQUESTS
+from config import COMPRESS_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzip-compressed
+    brotli = None
+
+# content codings we can produce, in order of preference
+CODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+@dataclass
+class Validators:
+    """ETag and Last-Modified of a response derived from the library version (see Database.get_library_version)."""
+    version: int
+    etag: str
+    last_modified: datetime  # naive UTC
+
+    @classmethod
+    def for_version(cls, version: int, changed_at: datetime, variant: str = "") -> "Validators":
+        # the change time keeps tags apart when the counter restarts with a new database;
+        # `variant` (path and query) keeps them apart between endpoints and filters
+        tag = f"{version}.{int(changed_at.replace(tzinfo=timezone.utc).timestamp() * 1000):x}"
+        if variant:
+            tag += "." + hashlib.blake2b(variant.encode(), digest_size=6).hexdigest()
+        # weak: gzip, brotli and identity bodies share the tag
+        return cls(version, f'W/"{tag}"', changed_at)
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            'ETag': self.etag,
+            'Last-Modified': format_datetime(self.last_modified.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True),
+            # browsers may keep the body but must ask before using it; the answer is usually a 304
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+
+    def matches(self, request: Request) -> bool:
+        """Whether the client's copy is current: If-None-Match if sent, otherwise If-Modified-Since."""
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or self.etag.removeprefix('W/') in tags
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+            # HTTP dates have whole seconds
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
+
+def negotiate(accept_encoding: str, available: Iterable[str] = CODINGS) -> str:
+    """The most preferred coding in `available` that Accept-Encoding allows, or 'identity'."""
+    weights = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+    best, best_weight = 'identity', 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 gives the same bytes for the same body
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+@dataclass
+class EncodedResponse:
+    """A JSON body serialized once, with compressed copies when it is large enough to be worth it."""
+    validators: Validators
+    bodies: Dict[str, bytes]  # by content coding; 'identity' is always there
+
+    @classmethod
+    def encode(cls, payload: Any, validators: Validators, codings: Iterable[str] = CODINGS) -> "EncodedResponse":
+        body = orjson.dumps(payload)
+        bodies = {'identity': body}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            for coding in codings:
+                if coding != 'identity':
+                    bodies[coding] = compress(body, coding)
+        return cls(validators, bodies)
+
+    def response(self, request: Request) -> Response:
+        if self.validators.matches(request):
+            return self.validators.not_modified()
+        coding = negotiate(request.headers.get('accept-encoding', ''), self.bodies)
+        headers = self.validators.headers()
+        if coding != 'identity':
+            headers['Content-Encoding'] = coding
+        return Response(self.bodies[coding], media_type="application/json", headers=headers)
+
+    def sizes(self) -> Dict[str, int]:
+        return {coding: len(body) for coding, body in self.bodies.items()}
+
+async def json_response(request: Request, validators: Validators, load: Callable[[], Awaitable[Any]]) -> Response:
+    """304 if the client is current, else `load()` serialized with orjson and compressed for this client.
+
+    Serializing and compressing run on a worker thread, off the event loop.
+    """
+    if validators.matches(request):
+        return validators.not_modified()
+    payload = await load()
+    coding = negotiate(request.headers.get('accept-encoding', ''))
+    encoded = await asyncio.get_running_loop().run_in_executor(
+        None, EncodedResponse.encode, payload, validators, (coding,)
+    )
+    return encoded.response(request)
+
+class ResponseSnapshots:
+    """Encoded responses kept until the library version they were built from changes.
+
+    The full /summaries and /articles maps are what clients load on start;
+    building them reads every row and serializes megabytes of JSON. Here each
+    is built once per library version, with every compressed copy, and then
+    served as stored bytes. Requests that arrive while a build runs wait for
+    it rather than starting their own.
+    """
+
+    def __init__(self, name: str = "library"):
+        self.name = name
+        self._snapshots: Dict[str, EncodedResponse] = {}
+        self._builds: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.counters = {'hits': 0, 'builds': 0, 'coalesced': 0, 'errors': 0}
+
+    async def get(self, key: str, validators: Validators,
+                  build: Callable[[], Awaitable[EncodedResponse]]) -> EncodedResponse:
+        """The snapshot `key` for `validators`, calling `build()` if the stored one is older."""
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None and snapshot.validators.etag == validators.etag:
+            self.counters['hits'] += 1
+            CACHE_REQUESTS.labels(self.name, 'hit').inc()
+            return snapshot
+
+        CACHE_REQUESTS.labels(self.name, 'miss').inc()
+        build_key = (key, validators.etag)
+        task = self._builds.get(build_key)
+        if task is None:
+            task = self._builds[build_key] = asyncio.ensure_future(self._build(key, build_key, build))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            self.counters['coalesced'] += 1
+        # shielded: a client that disconnects must not cancel the build the others wait for
+        return await asyncio.shield(task)
+
+    async def _build(self, key: str, build_key: Tuple[str, str],
+                     build: Callable[[], Awaitable[EncodedResponse]]) -> EncodedResponse:
+        try:
+            snapshot = await build()
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.warning(f"Building the {key} snapshot failed: {str(e)}")
+            raise
+        finally:
+            self._builds.pop(build_key, None)
+        self.counters['builds'] += 1
+        current = self._snapshots.get(key)
+        # a slow build for an older version must not replace a newer snapshot
+        if current is None or snapshot.validators.version >= current.validators.version:
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'snapshots': {
+                key: {
+                    'version': snapshot.validators.version,
+                    'etag': snapshot.validators.etag,
+                    'last_modified': snapshot.validators.last_modified.isoformat(),
+                    'bytes': snapshot.sizes()
+                }
+                for key, snapshot in self._snapshots.items()
+            },
+            'building': [key for key, _ in self._builds],
+            **self.counters
+        }
@@ -0,0 +1,53 @@
+import aiohttp
+from typing import Optional
+from loguru import logger
+from config import (
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_TOTAL_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT
+)
+
+# app-scoped session shared by article extraction, TTS and voice listing
+_session: Optional[aiohttp.ClientSession] = None
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        use_dns_cache=True
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=HTTP_TOTAL_TIMEOUT,
+        connect=HTTP_CONNECT_TIMEOUT,
+        sock_read=HTTP_READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+async def init_http_client() -> aiohttp.ClientSession:
+    """Create the shared HTTP session. Call once from the app or CLI entry point."""
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+        logger.info("Shared HTTP client started")
+    return _session
+
+async def close_http_client() -> None:
+    """Close the shared HTTP session and its connection pool."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Shared HTTP client closed")
+    _session = None
+
+def get_http_client() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it lazily if no entry point did."""
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+    return _session
@@ -1,25 +1,40 @@
-import os
 import asyncio
 import argparse
 from datetime import datetime
-from rss_feed import fetch_rss_feed
-from article_extraction import extract_articles
-from summarization import summarize_text
-from text_to_speech import convert_to_audio, select_tts_provider, select_voice, select_neets_model
-from utils import create_output_folder, sanitize_filename
-from config import OUTPUT_FOLDER, DEFAULT_TTS_PROVIDER, DEFAULT_NEETS_VOICE, DEFAULT_NEETS_MODEL, ELEVENLABS_VOICE_ID
+from rss_feed import fetch_rss_feed, save_feed_states
+from text_to_speech import select_tts_provider, select_voice, select_neets_model, fetch_elevenlabs_voices, fetch_neets_voices
+from utils import create_output_folder, local_timezone, day_range, to_utc
+from pipeline import build_article_pipeline, run_jobs
+from summarization import SummaryCache, SummarizationEngine
+from audio_store import collect_garbage
+from http_client import init_http_client, close_http_client
+from article_extraction import init_parse_pool, shutdown_parse_pool
+from config import OUTPUT_FOLDER, RSS_FEEDS, DEFAULT_TTS_PROVIDER, DEFAULT_NEETS_VOICE, DEFAULT_NEETS_MODEL, ELEVENLABS_VOICE_ID
 from models import Summary, Article
-from db import Database
+from db import Database, AsyncDatabase
 
 # Initialize database
-db = Database()
+db = AsyncDatabase(Database())
+summary_cache = SummaryCache(db)
+summarizer = SummarizationEngine(cache=summary_cache)
 
 def main(use_gui=False):
     if use_gui:
         launch_gui_with_defaults()
         return
 
-    asyncio.run(process_feeds())
+    asyncio.run(run_cli())
+
+async def run_cli():
+    # one pooled HTTP client and parse pool for the whole run
+    await init_http_client()
+    init_parse_pool()
+    try:
+        await process_feeds()
+    finally:
+        await close_http_client()
+        shutdown_parse_pool()
+        db.close()
 
 async def process_feeds():
     create_output_folder(OUTPUT_FOLDER)
@@ -30,50 +45,43 @@ async def process_feeds():
         selected_model = DEFAULT_NEETS_MODEL if tts_provider == "neets" else None
     else:
         if tts_provider == "elevenlabs":
-            voices = fetch_elevenlabs_voices()
+            voices = await fetch_elevenlabs_voices()
             selected_voice_id = select_voice(voices) or ELEVENLABS_VOICE_ID
             selected_model = None
         else:  # neets
-            voices = fetch_neets_voices()
+            voices = await fetch_neets_voices()
             selected_voice_id = select_voice(voices) or DEFAULT_NEETS_VOICE
             selected_model = select_neets_model()
 
-    urls = await fetch_rss_feed()
-    existing_articles = db.get_articles()
-    new_urls = [url for url in urls if url not in existing_articles]
-    new_articles = await extract_articles(new_urls)
-    
-    for article in new_articles:
-        article_dict = {
-            'url': article.url,
-            'title': article.title,
-            'content': article.content,
-            'publish_date': article.publish_date.isoformat() if article.publish_date else None
-        }
-        db.save_article(article_dict)
+    urls, feed_states = await fetch_rss_feed(RSS_FEEDS, db)
+    await db.enqueue_jobs(await db.filter_new_urls(urls))
+    # only now that the links are queued may the feeds count as read
+    await save_feed_states(db, feed_states)
 
-    today_articles = filter_articles_by_date(existing_articles, datetime.now().date())
+    # today's articles saved on an earlier run but never summarized go straight to the summarize stage
+    today = datetime.now().date()
+    await db.enqueue_jobs(
+        await db.get_unsummarized_urls(filter_date=today, tz=local_timezone()),
+        state='fetched'
+    )
 
-    for article in today_articles.values():
-        if article['url'] not in db.get_summaries():
-            summary_text = summarize_text(article['content'])
-            safe_title = sanitize_filename(article['title'])
-            audio_filename = f"{safe_title}.mp3"
-            audio_path = os.path.join(OUTPUT_FOLDER, audio_filename)
-            
-            if not os.path.exists(audio_path):
-                convert_to_audio(summary_text, audio_path, tts_provider, selected_voice_id, selected_model)
-            
-            db.save_summary(article['url'], {
-                'summary': summary_text,
-                'audio_path': f"/audio/{audio_filename}"
-            })
+    # only today's articles are summarized and narrated, the rest are just saved.
+    # Same naive UTC range as the query above; naive publish dates are UTC, not local time
+    today_start, today_end = day_range(today, local_timezone())
+    pipeline = build_article_pipeline(
+        db, tts_provider, selected_voice_id, selected_model,
+        accept=lambda article: today_start <= to_utc(article.publish_date) < today_end,
+        summarizer=summarizer
+    )
+    result = await run_jobs(db, pipeline)
+    await summary_cache.evict()
+    await db.run(collect_garbage, db.sync)
 
-    print(f"Processed {len(today_articles)} articles. Summaries and audio files saved.")
+    print(f"Processed {len(result.completed)} articles ({len(result.failed)} failed). Summaries and audio files saved.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="NarrateNews")
     parser.add_argument("--gui", action="store_true", help="Launch the GUI")
     args = parser.parse_args()
 
-    asyncio.run(main(use_gui=args.gui))
+    main(use_gui=args.gui)
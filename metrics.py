@@ -0,0 +1,66 @@
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+# Latency of each processing step. Steps: rss_fetch, html_fetch, parse, summarize, tts, db_write
+STAGE_SECONDS = Histogram(
+    'narratenews_stage_duration_seconds',
+    'Time spent in one processing step for one item',
+    ['stage'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+ARTICLES = Counter(
+    'narratenews_articles_total',
+    'Articles that left the pipeline, by outcome (completed, failed, skipped)',
+    ['outcome']
+)
+
+CACHE_REQUESTS = Counter(
+    'narratenews_cache_requests_total',
+    'Cache lookups by cache (summary, audio, voices, library) and result (hit, stale, miss)',
+    ['cache', 'result']
+)
+
+QUEUE_DEPTH = Gauge(
+    'narratenews_queue_depth',
+    'Items waiting in front of a pipeline stage',
+    ['stage']
+)
+
+PROVIDER_IN_FLIGHT = Gauge(
+    'narratenews_provider_in_flight',
+    'Calls to an LLM or TTS provider currently running',
+    ['provider']
+)
+
+PROVIDER_CONCURRENCY = Gauge(
+    'narratenews_provider_concurrency_limit',
+    'Current adaptive concurrency limit of a provider',
+    ['provider']
+)
+
+PROVIDER_SECONDS = Histogram(
+    'narratenews_provider_call_duration_seconds',
+    'Duration of a single call to an LLM or TTS provider, retries excluded',
+    ['provider'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+
+PROVIDER_THROTTLED = Counter(
+    'narratenews_provider_throttled_total',
+    'Calls a provider answered with 429',
+    ['provider']
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'narratenews_http_request_duration_seconds',
+    'API request latency by route prefix, method and status',
+    ['route', 'method', 'status']
+)
+
+def observe(stage):
+    """Context manager that records the duration of a processing step."""
+    return STAGE_SECONDS.labels(stage).time()
+
+def render():
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
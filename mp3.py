@@ -0,0 +1,105 @@
+import os
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+# MPEG audio frame header tables, indexed by [version][layer] and [version]
+# versions: 1, 2 and 2.5; layers: 1, 2 and 3
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+def frame_length(header: bytes) -> Optional[int]:
+    """Length in bytes of the frame starting with this 4-byte header, or None if it is not a frame header."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = _VERSIONS.get((header[1] >> 3) & 0b11)
+    layer = _LAYERS.get((header[1] >> 1) & 0b11)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # reserved values, or free format which has no fixed frame size
+
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 1
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and version != 1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+def strip_tags(data: bytes) -> bytes:
+    """Drop leading ID3v2 tags and a trailing ID3v1 tag."""
+    while data[:3] == b'ID3' and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b'TAG':
+        data = data[:-128]
+    return data
+
+def is_info_frame(frame: bytes) -> bool:
+    """Whether a frame is a Xing/Info/VBRI header, which describes one file and is wrong for a joined one."""
+    head = frame[:64]
+    return b'Xing' in head or b'Info' in head or frame[36:40] == b'VBRI'
+
+def iter_frames(data: bytes) -> Iterator[Tuple[int, int]]:
+    """Yield (offset, length) of every audio frame, skipping bytes that do not belong to a frame.
+
+    A header only counts if the frame it describes is followed by another
+    header or by the end of the data, so stray sync bits are not mistaken
+    for frames.
+    """
+    pos, end = 0, len(data)
+    while pos + 4 <= end:
+        length = frame_length(data[pos:pos + 4])
+        if length and pos + length <= end:
+            following = pos + length
+            if following == end or following + 4 > end or frame_length(data[following:following + 4]):
+                yield pos, length
+                pos = following
+                continue
+        pos += 1
+
+def audio_frames(data: bytes) -> bytes:
+    """The audio frames of an MP3 file, without tags or a Xing/Info header."""
+    data = strip_tags(data)
+    frames = []
+    for i, (offset, length) in enumerate(iter_frames(data)):
+        frame = data[offset:offset + length]
+        if i == 0 and is_info_frame(frame):
+            continue
+        frames.append(frame)
+    return b''.join(frames)
+
+def concat_files(paths: List[str], output_path: str, tmp_dir: Optional[str] = None) -> str:
+    """Join MP3 files frame by frame, without re-encoding, into output_path.
+
+    The segments must share a sample rate and channel mode, which holds for
+    segments synthesized with the same voice and model. The result is
+    written in `tmp_dir` (default: next to the target, which must be on the
+    same filesystem) and renamed into place, so it is never seen half written.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=tmp_dir or os.path.dirname(output_path) or ".")
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for path in paths:
+                with open(path, 'rb') as f:
+                    out.write(audio_frames(f.read()))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return output_path
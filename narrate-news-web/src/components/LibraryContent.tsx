@@ -17,7 +17,6 @@ import {
 } from "@/components/ui/popover";
 import { cn } from "@/lib/utils";
 import { useInView } from 'react-intersection-observer';
-import { createPollingFunction } from "@/lib/api";
 
 const LoadingSkeleton = () => (
   <div className="space-y-4">
@@ -48,9 +47,7 @@ export default function LibraryContent() {
 
   useEffect(() => {
     setLoading(true);
-    const stopPolling = createPollingFunction(
-      () => api.getSummaries()
-    )((newSummaries) => {
+    const unsubscribe = api.subscribeSummaries((newSummaries) => {
       const dateStr = format(date, 'yyyy-MM-dd');
       const filteredSummaries: typeof newSummaries = {};
       
@@ -71,8 +68,8 @@ export default function LibraryContent() {
       setLoading(false);
     });
 
-    return () => stopPolling();
-  }, [date]); // Only recreate polling when date changes
+    return () => unsubscribe();
+  }, [date]); // Only resubscribe when date changes
 
   useEffect(() => {
     return () => {
@@ -22,7 +22,6 @@ import {
 } from "@/components/ui/popover";
 import { cn } from "@/lib/utils";
 import * as api from "@/lib/api";
-import { createPollingFunction } from "@/lib/api";
 
 export default function PlayerContent() {
   const [summaries, setSummaries] = useState<api.Summary[]>([]);
@@ -35,9 +34,7 @@ export default function PlayerContent() {
   const [isLoading, setIsLoading] = useState(false);
 
   useEffect(() => {
-    const stopPolling = api.createPollingFunction(
-      () => api.getSummaries()
-    )((newSummaries) => {
+    const unsubscribe = api.subscribeSummaries((newSummaries) => {
       const dateStr = format(date, 'yyyy-MM-dd');
       const filteredSummaries = Object.values(newSummaries)
         .filter(summary => {
@@ -51,7 +48,7 @@ export default function PlayerContent() {
       setSummaries(filteredSummaries);
     });
 
-    return () => stopPolling();
+    return () => unsubscribe();
   }, [date]); // Only recreate polling when date changes
 
   const playAudio = async (index: number) => {
@@ -74,6 +74,28 @@ export async function getSummaries(): Promise<{ [key: string]: Summary }> {
   });
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+export async function getSummariesPage(
+  limit = 50,
+  cursor?: string | null,
+  fields?: string[]
+): Promise<Page<Partial<Summary> & { article: Partial<Article> & { url: string } }>> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+  if (fields?.length) params.set("fields", fields.join(","));
+  const response = await fetch(`${API_BASE_URL}/summaries?${params}`);
+  return handleResponse(response);
+}
+
+export async function getArticleDetail(url: string): Promise<Summary> {
+  const response = await fetch(`${API_BASE_URL}/articles/detail?url=${encodeURIComponent(url)}`);
+  return handleResponse(response);
+}
+
 export async function getVoices(provider: string): Promise<Voice[]> {
   const response = await fetch(`${API_BASE_URL}/voices/${provider}`);
   const voices = await handleResponse(response);
@@ -104,6 +126,120 @@ export async function startProcessing(): Promise<void> {
   await handleResponse(response);
 }
 
+export type ProcessingEventType = "ready" | "resync" | "run" | "article" | "summary";
+
+export interface RunEvent {
+  status: "started" | "finished" | "failed";
+  trigger: string;
+  started_at: string;
+  finished_at?: string;
+  duration?: number;
+  error?: string | null;
+  result?: { processed: number; failed: number; skipped: number } | null;
+}
+
+export interface ArticleEvent {
+  url: string;
+  stage: "extract" | "summarize" | "narrate";
+  status: "done" | "failed" | "skipped";
+  title?: string;
+  error?: string;
+}
+
+// A new /summaries entry, without the article content. `preview` is true while
+// audio_path points at the first narrated segment only.
+export interface SummaryEvent {
+  url: string;
+  summary: string;
+  audio_path: string;
+  preview: boolean;
+  article: Omit<Article, "content">;
+}
+
+type EventHandlers = {
+  ready?: (data: { boot_id: string }, id: string) => void;
+  resync?: (data: { reason: string }, id: string) => void;
+  run?: (data: RunEvent, id: string) => void;
+  article?: (data: ArticleEvent, id: string) => void;
+  summary?: (data: SummaryEvent, id: string) => void;
+};
+
+// Subscribes to the server's processing events. The browser reconnects by itself and
+// resumes after the last event it received; pass `since` (an event id) to resume a
+// stream from an earlier page load. Returns a function that closes the stream.
+export function subscribeEvents(handlers: EventHandlers, since?: string | null): () => void {
+  const url = since
+    ? `${API_BASE_URL}/events?since=${encodeURIComponent(since)}`
+    : `${API_BASE_URL}/events`;
+  const source = new EventSource(url);
+  (Object.keys(handlers) as ProcessingEventType[]).forEach((type) => {
+    source.addEventListener(type, (event) => {
+      const message = event as MessageEvent;
+      (handlers[type] as (data: unknown, id: string) => void)(JSON.parse(message.data), message.lastEventId);
+    });
+  });
+  return () => source.close();
+}
+
+// Same contract as createPollingFunction(getSummaries): calls back with the full
+// summaries map. The map is loaded once when the stream opens, then patched from
+// `summary` events, and only reloaded when the server asks for a resync. Events that
+// arrive while a reload is in flight are held and replayed on top of its result, so
+// the reload cannot overwrite them.
+export function subscribeSummaries(callback: (summaries: { [key: string]: Summary }) => void) {
+  let summaries: { [key: string]: Summary } = {};
+  let closed = false;
+  // events received since the newest reload started; null when none is in flight
+  let pending: SummaryEvent[] | null = null;
+  let generation = 0;
+
+  const apply = ({ url, summary, audio_path, article }: SummaryEvent) => {
+    const content = summaries[url]?.article.content ?? "";
+    summaries = { ...summaries, [url]: { article: { ...article, content }, summary, audio_path } };
+  };
+
+  const reload = async () => {
+    const current = ++generation;
+    pending = [];
+    try {
+      const response = await fetch(`${API_BASE_URL}/summaries`);
+      const loaded = await handleResponse(response);
+      // a newer reload started meanwhile; its result wins
+      if (current !== generation) return;
+      summaries = loaded;
+      pending.forEach(apply);
+      pending = null;
+      if (!closed) callback(summaries);
+    } catch (error) {
+      console.error('Error loading summaries:', error);
+      if (current === generation && pending) {
+        // keep what we had, plus whatever arrived in the meantime
+        pending.forEach(apply);
+        pending = null;
+        if (!closed) callback(summaries);
+      }
+    }
+  };
+
+  const unsubscribe = subscribeEvents({
+    ready: reload,
+    resync: reload,
+    summary: (event) => {
+      if (pending) {
+        pending.push(event);
+        return;
+      }
+      apply(event);
+      if (!closed) callback(summaries);
+    },
+  });
+
+  return () => {
+    closed = true;
+    unsubscribe();
+  };
+}
+
 export function createPollingFunction<T>(
   fetchFn: () => Promise<T>,
   interval: number = 5000
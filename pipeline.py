@@ -0,0 +1,402 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Tuple, Union
+from loguru import logger
+from article_extraction import extract_article_content
+from summarization import SummarizationEngine
+from text_to_speech import convert_to_audio
+from audio_store import audio_blob_name, audio_blob_path, audio_url, publish_preview
+from models import Article
+from db import AsyncDatabase
+from metrics import ARTICLES, QUEUE_DEPTH, observe
+from events import event_bus
+from utils import to_utc
+from config import (
+    SUMMARIZER_MODEL,
+    PIPELINE_QUEUE_SIZE,
+    EXTRACT_WORKERS,
+    SUMMARIZE_WORKERS,
+    NARRATE_WORKERS,
+    DB_WRITE_BATCH_SIZE,
+    DB_WRITE_MAX_DELAY,
+    JOB_CLAIM_LIMIT,
+    TTS_PUBLISH_FIRST_SEGMENT
+)
+
+# stage a job re-enters the pipeline at, by the last state it completed
+JOB_ENTRY_STAGES = {
+    'queued': 'extract',
+    'fetched': 'summarize',
+    'summarized': 'narrate',
+    'narrated': 'narrate'
+}
+
+@dataclass
+class PipelineItem:
+    """An article travelling through the pipeline, filled in stage by stage."""
+    url: str
+    stage: str = "extract"  # stage the item enters the pipeline at
+    article: Optional[Article] = None
+    summary: Optional[str] = None
+    audio_path: Optional[str] = None
+    error: Optional[str] = None
+    # resolves once the article row queued by the extract stage is written (see BatchWriter.add)
+    article_saved: Optional[asyncio.Future] = None
+
+@dataclass
+class Stage:
+    name: str
+    handler: Callable[[PipelineItem], Awaitable[Optional[PipelineItem]]]
+    workers: int = 1
+
+@dataclass
+class PipelineResult:
+    completed: List[PipelineItem] = field(default_factory=list)
+    failed: List[PipelineItem] = field(default_factory=list)
+    skipped: List[PipelineItem] = field(default_factory=list)
+
+def publish_stage(item: PipelineItem, stage: str, status: str) -> None:
+    """Announce that `item` finished (done, failed or skipped) a stage."""
+    data = {'url': item.url, 'stage': stage, 'status': status}
+    if item.article is not None:
+        data['title'] = item.article.title
+    if status == 'failed':
+        data['error'] = item.error
+    event_bus.publish('article', data)
+
+def summary_event(item: PipelineItem, audio_path: str, preview: bool = False) -> dict:
+    """A new summary in the shape of a /summaries entry, without the article content."""
+    article = item.article
+    return {
+        'url': item.url,
+        'summary': item.summary,
+        'audio_path': audio_path,
+        'preview': preview,
+        'article': {
+            'url': item.url,
+            'title': article.title,
+            # naive UTC, as /summaries returns it
+            'publish_date': to_utc(article.publish_date).isoformat() if article.publish_date else None
+        }
+    }
+
+class BatchWriter:
+    """Buffers rows and writes them with one bulk call.
+
+    Rows are flushed once `batch_size` are queued or `max_delay` seconds after
+    the first buffered row, whichever comes first, so results still show up
+    promptly while a slow stage trickles items through. Flushes run one at a
+    time, so once flush() returns every row added before it has been written
+    or has failed. add() returns a future per row that holds the outcome; if
+    a batch fails, its rows are retried one at a time so a single bad row
+    does not take the others down with it.
+    """
+
+    def __init__(self, write: Callable[[List[Any]], Awaitable[None]], batch_size: int = DB_WRITE_BATCH_SIZE,
+                 max_delay: float = DB_WRITE_MAX_DELAY):
+        self.write = write
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._rows: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timed_flush: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def add(self, row: Any) -> asyncio.Future:
+        """Queue `row`; the returned future resolves once it is written, or holds the write error."""
+        saved = asyncio.get_running_loop().create_future()
+        # rows nobody waits for must not warn about an unretrieved error; it is logged in flush()
+        saved.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._rows.append((row, saved))
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush_later)
+        return saved
+
+    def _flush_later(self) -> None:
+        self._timer = None
+        self._timed_flush = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            pending, self._rows = self._rows, []
+            if not pending:
+                return
+            try:
+                with observe('db_write'):
+                    await self.write([row for row, _ in pending])
+            except Exception as e:
+                logger.error(f"Error writing batch of {len(pending)} rows: {str(e)}")
+                if len(pending) == 1:
+                    pending[0][1].set_exception(e)
+                    return
+                for row, saved in pending:
+                    try:
+                        await self.write([row])
+                        saved.set_result(None)
+                    except Exception as e:
+                        logger.error(f"Error writing row: {str(e)}")
+                        saved.set_exception(e)
+                return
+            for _, saved in pending:
+                saved.set_result(None)
+
+class Pipeline:
+    """Runs items through a chain of stages joined by bounded queues.
+
+    Every stage has its own pool of workers, so slow network calls in one
+    stage overlap with work in the others. A handler that raises marks only
+    that item as failed and is reported to `on_error`; a handler that returns
+    None drops the item.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = PIPELINE_QUEUE_SIZE,
+                 writers: Optional[List[BatchWriter]] = None,
+                 on_error: Optional[Callable[[PipelineItem], Awaitable[None]]] = None):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.writers = writers or []
+        self.on_error = on_error
+
+    def _stage_index(self, name: str) -> int:
+        for i, stage in enumerate(self.stages):
+            if stage.name == name:
+                return i
+        raise ValueError(f"Unknown pipeline stage: {name}")
+
+    async def _worker(self, index: int, queues: List[asyncio.Queue], result: PipelineResult):
+        stage = self.stages[index]
+        queue = queues[index]
+        while True:
+            item = await queue.get()
+            try:
+                try:
+                    output = await stage.handler(item)
+                except Exception as e:
+                    item.error = f"{stage.name}: {e}"
+                    logger.error(f"Stage {stage.name} failed for {item.url}: {str(e)}")
+                    result.failed.append(item)
+                    ARTICLES.labels('failed').inc()
+                    publish_stage(item, stage.name, 'failed')
+                    if self.on_error is not None:
+                        try:
+                            await self.on_error(item)
+                        except Exception as e:
+                            logger.error(f"Error recording failure of {item.url}: {str(e)}")
+                    continue
+
+                publish_stage(item if output is None else output, stage.name, 'skipped' if output is None else 'done')
+                if output is None:
+                    result.skipped.append(item)
+                    ARTICLES.labels('skipped').inc()
+                elif index + 1 < len(self.stages):
+                    await queues[index + 1].put(output)
+                else:
+                    result.completed.append(output)
+                    ARTICLES.labels('completed').inc()
+            finally:
+                queue.task_done()
+
+    async def run(self, items: Union[Iterable[PipelineItem], AsyncIterable[PipelineItem]]) -> PipelineResult:
+        """Push items through every stage and wait until all of them settle.
+
+        `items` may be an async iterable, which is only read as fast as the
+        first queues drain.
+        """
+        result = PipelineResult()
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        for stage, queue in zip(self.stages, queues):
+            QUEUE_DEPTH.labels(stage.name).set_function(queue.qsize)
+        workers = [
+            asyncio.create_task(self._worker(i, queues, result))
+            for i, stage in enumerate(self.stages)
+            for _ in range(max(1, stage.workers))
+        ]
+        try:
+            if isinstance(items, AsyncIterable):
+                async for item in items:
+                    await queues[self._stage_index(item.stage)].put(item)
+            else:
+                for item in items:
+                    await queues[self._stage_index(item.stage)].put(item)
+            # Each stage only feeds the next one, so draining them in order
+            # guarantees nothing is still in flight when we stop.
+            for queue in queues:
+                await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for writer in self.writers:
+                await writer.flush()
+            for stage in self.stages:
+                QUEUE_DEPTH.labels(stage.name).set_function(lambda: 0)
+        return result
+
+def build_article_pipeline(db: AsyncDatabase, tts_provider: str, voice_id: str, model: Optional[str] = None,
+                           accept: Optional[Callable[[Article], bool]] = None,
+                           summarizer_model: str = SUMMARIZER_MODEL,
+                           summarizer: Optional[SummarizationEngine] = None,
+                           publish_first_segment: bool = TTS_PUBLISH_FIRST_SEGMENT) -> Pipeline:
+    """Create the extract -> summarize -> narrate pipeline used by the API and the CLI.
+
+    `accept` can be used to hold articles back before they are summarized
+    (they are still saved to the database). Pass a shared `summarizer` to keep
+    its summary cache and request counters across runs. With
+    `publish_first_segment` the summary is listed as soon as the first audio
+    segment is ready, pointing at a preview until the full narration is done.
+
+    Every item is expected to have a row in the jobs table. Each stage records
+    its output on the job once it is durable, so an item resumed after a crash
+    or a failure skips the LLM and TTS calls it already paid for.
+    """
+
+    summarizer = summarizer or SummarizationEngine()
+
+    async def write_articles(rows):
+        await db.save_articles(rows)
+        await db.advance_jobs([row['url'] for row in rows], 'fetched')
+
+    # articles and summaries are written in batches rather than one commit per item
+    article_writer = BatchWriter(write_articles)
+
+    async def write_summaries(rows):
+        # a summary is only listed once its article row exists
+        await article_writer.flush()
+        summaries = {url: summary for url, summary, _ in rows}
+        await db.save_summaries(summaries)
+        await db.complete_jobs(list(summaries))
+        # announced once on disk, so a client that reloads /summaries afterwards sees them too
+        for _, _, event in rows:
+            event_bus.publish('summary', event)
+
+    summary_writer = BatchWriter(write_summaries)
+
+    async def article_saved(item: PipelineItem) -> None:
+        """Wait until the item's article row is written; raises if writing it failed.
+
+        Only this row's future is awaited: the batch is written when it fills
+        up or its delay runs out, so other workers' rows still share the commit.
+        """
+        if item.article_saved is not None:
+            await item.article_saved
+
+    async def extract(item: PipelineItem) -> PipelineItem:
+        article = await extract_article_content(item.url)
+        item.article_saved = await article_writer.add({
+            'url': article.url,
+            'title': article.title,
+            'content': article.content,
+            'publish_date': article.publish_date.isoformat() if article.publish_date else None
+        })
+        item.article = article
+        return item
+
+    async def summarize(item: PipelineItem) -> Optional[PipelineItem]:
+        if accept is not None and not accept(item.article):
+            # finished for good: left runnable, the job would be claimed and turned down on every run
+            await article_saved(item)
+            await db.advance_job(item.url, 'skipped')
+            return None
+        if item.summary is None:
+            logger.info(f"Generating summary for: {item.article.title}")
+            with observe('summarize'):
+                item.summary = await summarizer.summarize(item.article.content, model=summarizer_model, key=item.url)
+            # the job may only move past 'fetched' once its article row is on disk
+            await article_saved(item)
+            await db.advance_job(item.url, 'summarized', summary=item.summary)
+        return item
+
+    async def narrate(item: PipelineItem) -> PipelineItem:
+        if item.audio_path is None:
+            # same summary + voice -> same blob, so re-narrations reuse the stored file
+            audio_filename = audio_blob_name(item.summary, tts_provider, voice_id, model)
+            logger.info(f"Converting summary to audio: {audio_filename}")
+
+            async def publish_first(segment_path):
+                preview = await asyncio.get_running_loop().run_in_executor(
+                    None, publish_preview, segment_path, audio_filename
+                )
+                # written directly, not batched: the point is to list it right away.
+                # The job stays open until the final audio path is saved.
+                await article_saved(item)
+                await db.save_summary(item.url, {'summary': item.summary, 'audio_path': audio_url(preview)})
+                event_bus.publish('summary', summary_event(item, audio_url(preview), preview=True))
+
+            with observe('tts'):
+                await convert_to_audio(
+                    text=item.summary,
+                    output_file_path=audio_blob_path(audio_filename),
+                    provider=tts_provider,
+                    voice_id=voice_id,
+                    model=model,
+                    on_first_segment=publish_first if publish_first_segment else None
+                )
+            item.audio_path = audio_url(audio_filename)
+            await db.advance_job(item.url, 'narrated', audio_path=item.audio_path)
+
+        await summary_writer.add((item.url, {
+            'summary': item.summary,
+            'audio_path': item.audio_path
+        }, summary_event(item, item.audio_path)))
+        logger.info(f"Completed processing: {item.article.title}")
+        return item
+
+    async def record_failure(item: PipelineItem) -> None:
+        # keep job updates in order: a pending 'fetched' must not land after the failure
+        await article_writer.flush()
+        await db.fail_job(item.url, item.error)
+
+    return Pipeline([
+        Stage("extract", extract, EXTRACT_WORKERS),
+        Stage("summarize", summarize, SUMMARIZE_WORKERS),
+        Stage("narrate", narrate, NARRATE_WORKERS),
+    ], writers=[article_writer, summary_writer], on_error=record_failure)
+
+async def job_item(db: AsyncDatabase, job: dict) -> PipelineItem:
+    """Turn a claimed job back into a pipeline item at the stage it stopped at."""
+    item = PipelineItem(
+        url=job['url'],
+        stage=JOB_ENTRY_STAGES[job['state']],
+        summary=job['summary'],
+        audio_path=job['audio_path']
+    )
+    if item.stage != "extract":
+        stored = await db.get_article(job['url'])
+        if stored is None:
+            # the article row is gone; fetch it again, the summary and audio are kept
+            item.stage = "extract"
+        else:
+            article = stored['article']
+            item.article = Article(
+                url=article['url'],
+                title=article['title'],
+                content=article['content'],
+                publish_date=datetime.fromisoformat(article['publish_date']).replace(tzinfo=timezone.utc)
+            )
+    return item
+
+async def run_jobs(db: AsyncDatabase, pipeline: Pipeline, limit: int = JOB_CLAIM_LIMIT) -> PipelineResult:
+    """Claim runnable jobs and push them through `pipeline`.
+
+    Claims left over when the run ends (jobs a cancelled run never reached)
+    are released so the next run can pick those jobs up straight away.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    jobs = await db.claim_jobs(worker_id, limit)
+    logger.info(f"Claimed {len(jobs)} jobs")
+    try:
+        # articles of resumed jobs are loaded as the pipeline takes them in
+        return await pipeline.run(await job_item(db, job) for job in jobs)
+    finally:
+        await db.release_jobs(worker_id)
@@ -0,0 +1,216 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+import aiohttp
+from loguru import logger
+from metrics import PROVIDER_IN_FLIGHT, PROVIDER_CONCURRENCY, PROVIDER_SECONDS, PROVIDER_THROTTLED
+from config import RATE_LIMITS, RATE_LIMIT_MAX_RETRIES, RATE_LIMIT_BACKOFF_BASE, RATE_LIMIT_BACKOFF_MAX
+
+class TokenBucket:
+    """Allows `rate_per_minute` units per minute, with bursts of up to `capacity`.
+
+    A rate of 0 or less means unlimited. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_minute = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Take `amount` units, waiting for them if needed; returns the seconds waited."""
+        if self.rate <= 0 or amount <= 0:
+            return 0.0
+        # a request larger than the bucket could never fit, let it through once the bucket is full
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+class AdaptiveConcurrency:
+    """Concurrency limit that adapts AIMD-style.
+
+    Every success raises the limit by about one per `limit` successes
+    (additive increase); every throttled call halves it (multiplicative
+    decrease). The limit stays between 1 and `max_limit`.
+    """
+
+    def __init__(self, max_limit: int, decrease: float = 0.5):
+        self.max_limit = max(1, max_limit)
+        self.limit = float(self.max_limit)
+        self.decrease_factor = decrease
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < max(1, int(self.limit)))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def increase(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1 / max(1.0, self.limit))
+
+    def decrease(self) -> None:
+        self.limit = max(1.0, self.limit * self.decrease_factor)
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on an aiohttp or litellm error, if there is one."""
+    headers = getattr(exc, 'headers', None)
+    if headers is None:
+        headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def classify(exc: BaseException) -> str:
+    """'throttled' for 429s, 'transient' for errors worth retrying, 'fatal' otherwise."""
+    status = getattr(exc, 'status', None) or getattr(exc, 'status_code', None)
+    if status == 429:
+        return 'throttled'
+    if isinstance(status, int) and (status >= 500 or status == 408):
+        return 'transient'
+    if isinstance(exc, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)):
+        return 'transient'
+    return 'fatal'
+
+class ProviderLimiter:
+    """Rate limits, adaptive concurrency and retries for calls to one provider.
+
+    Calls wait for a request token, for `chars` character tokens and for a
+    concurrency slot. A 429 pauses every call to the provider for the
+    Retry-After period (or an exponential backoff) and shrinks the
+    concurrency limit; successes grow it back.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, chars_per_minute: float = 0,
+                 max_concurrency: int = 4, max_retries: int = RATE_LIMIT_MAX_RETRIES):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.chars = TokenBucket(chars_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.blocked_until = 0.0
+        self.counters = {
+            'calls': 0,
+            'throttled': 0,
+            'retries': 0,
+            'failures': 0,
+            'waits': 0,
+            'wait_seconds': 0.0
+        }
+        PROVIDER_IN_FLIGHT.labels(name).set_function(lambda: self.concurrency.in_flight)
+        PROVIDER_CONCURRENCY.labels(name).set_function(lambda: max(1, int(self.concurrency.limit)))
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(RATE_LIMIT_BACKOFF_MAX, RATE_LIMIT_BACKOFF_BASE * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _wait(self, chars: int) -> None:
+        waited = max(0.0, self.blocked_until - time.monotonic())
+        if waited:
+            await asyncio.sleep(waited)
+        waited += await self.requests.acquire(1)
+        waited += await self.chars.acquire(chars)
+        if waited > 0:
+            self.counters['waits'] += 1
+            self.counters['wait_seconds'] += waited
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], chars: int = 0) -> Any:
+        """Run `fn()` within the provider's limits, retrying throttled and transient failures."""
+        attempt = 0
+        while True:
+            await self._wait(chars)
+            async with self.concurrency:
+                self.counters['calls'] += 1
+                try:
+                    with PROVIDER_SECONDS.labels(self.name).time():
+                        result = await fn()
+                except Exception as e:
+                    kind = classify(e)
+                    if kind == 'throttled':
+                        self.counters['throttled'] += 1
+                        PROVIDER_THROTTLED.labels(self.name).inc()
+                        self.concurrency.decrease()
+                    if kind == 'fatal' or attempt >= self.max_retries:
+                        self.counters['failures'] += 1
+                        raise
+                    delay = retry_after(e) if kind == 'throttled' else None
+                    if delay is None:
+                        delay = self._backoff(attempt)
+                    if kind == 'throttled':
+                        # everyone waits, not just this call
+                        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+                    logger.warning(
+                        f"{self.name} call {kind} ({e}), retrying in {delay:.1f}s "
+                        f"(attempt {attempt + 1}/{self.max_retries}, concurrency {int(self.concurrency.limit)})"
+                    )
+                else:
+                    self.concurrency.increase()
+                    return result
+            self.counters['retries'] += 1
+            attempt += 1
+            if kind != 'throttled':
+                await asyncio.sleep(delay)
+
+    def status(self) -> Dict[str, Any]:
+        blocked = self.blocked_until - time.monotonic()
+        return {
+            'requests_per_minute': self.requests.rate_per_minute,
+            'chars_per_minute': self.chars.rate_per_minute,
+            'max_concurrency': self.concurrency.max_limit,
+            'concurrency_limit': max(1, int(self.concurrency.limit)),
+            'in_flight': self.concurrency.in_flight,
+            'blocked_for': round(blocked, 3) if blocked > 0 else 0,
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.counters.items()}
+        }
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """The shared limiter of a provider, configured from RATE_LIMITS (or its 'default' entry)."""
+    if provider not in _limiters:
+        _limiters[provider] = ProviderLimiter(provider, **RATE_LIMITS.get(provider, RATE_LIMITS['default']))
+    return _limiters[provider]
+
+def llm_provider(model: str) -> str:
+    """Provider of a litellm model name, e.g. 'openrouter' for 'openrouter/google/gemini-flash-1.5-8b'."""
+    return model.split('/', 1)[0] if '/' in model else 'openai'
+
+def limiter_status() -> Dict[str, Any]:
+    """Status of every configured provider, plus any other provider that has been called."""
+    for provider in RATE_LIMITS:
+        if provider != 'default':
+            get_limiter(provider)
+    return {name: limiter.status() for name, limiter in _limiters.items()}
@@ -1,11 +1,103 @@
 import asyncio
+import time
+from datetime import datetime
 import feedparser
-from config import RSS_FEEDS
+from loguru import logger
+from http_client import get_http_client
+from metrics import STAGE_SECONDS
+from config import RSS_FEEDS, RSS_FETCH_CONCURRENCY
+
+async def fetch_feed(feed_url, state=None, semaphore=None):
+    """Fetch a single feed with a conditional GET.
+
+    Returns a dict with the entry links (empty when the feed is unchanged)
+    and the new state to store for the feed.
+    """
+    state = state or {}
+    headers = {"User-Agent": feedparser.USER_AGENT}
+    if state.get('etag'):
+        headers["If-None-Match"] = state['etag']
+    if state.get('last_modified'):
+        headers["If-Modified-Since"] = state['last_modified']
+
+    result = {
+        'feed_url': feed_url,
+        'etag': state.get('etag'),
+        'last_modified': state.get('last_modified'),
+        'entry_ids': state.get('entry_ids', []),
+        'entries': len(state.get('entry_ids', [])),
+        'new_entries': 0,
+        'error': None,
+        'http_status': None,
+        'links': []
+    }
+
+    start = time.perf_counter()
+    try:
+        async with semaphore or asyncio.Semaphore(1):
+            async with get_http_client().get(feed_url, headers=headers) as response:
+                result['http_status'] = response.status
+                if response.status == 304:
+                    result['status'] = 'not_modified'
+                    return result
+                response.raise_for_status()
+                body = await response.read()
+                result['etag'] = response.headers.get('ETag')
+                result['last_modified'] = response.headers.get('Last-Modified')
+
+        loop = asyncio.get_running_loop()
+        feed = await loop.run_in_executor(None, feedparser.parse, body)
+
+        entry_ids = [entry.get('id') or entry.get('link') for entry in feed.entries]
+        seen = set(result['entry_ids'])
+        result['entries'] = len(entry_ids)
+        result['new_entries'] = sum(1 for entry_id in entry_ids if entry_id not in seen)
+        result['entry_ids'] = entry_ids
+
+        # servers without validators still send the full feed, skip it if nothing new showed up
+        if seen and result['new_entries'] == 0:
+            result['status'] = 'unchanged'
+        else:
+            result['status'] = 'ok'
+            result['links'] = [entry.link for entry in feed.entries if entry.get('link')]
+    except Exception as e:
+        logger.error(f"Error fetching feed {feed_url}: {str(e)}")
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels('rss_fetch').observe(elapsed)
+        result['fetch_ms'] = round(elapsed * 1000, 1)
+        result['fetched_at'] = datetime.now()
+
+    return result
+
+async def fetch_rss_feed(rss_feeds=RSS_FEEDS, db=None):
+    """Poll all feeds concurrently; returns the links of the ones that changed and their new states.
+
+    When an AsyncDatabase is given, each feed's ETag/Last-Modified and last
+    seen entry ids are loaded from its feed_state table. The new states are
+    not saved here: pass them to save_feed_states() once the links are
+    queued, or a run that stops in between would lose those entries for good
+    (the next poll would get a 304, or see them as already seen).
+    """
+    states = await db.get_feed_states() if db else {}
+    semaphore = asyncio.Semaphore(RSS_FETCH_CONCURRENCY)
+    results = await asyncio.gather(*[
+        fetch_feed(feed_url, states.get(feed_url), semaphore)
+        for feed_url in rss_feeds
+    ])
 
-async def fetch_rss_feed(rss_feeds):
-    loop = asyncio.get_event_loop()
     all_entries = []
-    for feed_url in rss_feeds:
-        feed = await loop.run_in_executor(None, feedparser.parse, feed_url)
-        all_entries.extend([entry.link for entry in feed.entries])
-    return all_entries
\ No newline at end of file
+    for result in results:
+        logger.info(
+            f"Feed {result['feed_url']}: {result['status']} "
+            f"({result['new_entries']}/{result['entries']} new) in {result['fetch_ms']}ms"
+        )
+        all_entries.extend(result['links'])
+    return all_entries, results
+
+async def save_feed_states(db, results):
+    """Store the validators and poll results returned by fetch_rss_feed()."""
+    for result in results:
+        await db.save_feed_state(result['feed_url'], result)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from loguru import logger
+from events import event_bus
+
+class ProcessingScheduler:
+    """Runs `job` every `interval()` seconds and on demand, never more than once at a time.
+
+    Triggers that arrive while a run is in progress join that run instead of
+    starting another one. Pausing only stops scheduled runs; explicit
+    triggers still go through. An interval of 0 or less disables scheduling.
+    """
+
+    def __init__(self, job: Callable[[], Awaitable[Any]], interval: Callable[[], float]):
+        self.job = job
+        self.interval = interval
+        self.paused = False
+        self.runs = 0
+        self.next_run_at: Optional[datetime] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._current: Optional[asyncio.Task] = None
+        self._current_run: Optional[Dict[str, Any]] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._schedule_loop())
+            logger.info("Processing scheduler started")
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._loop_task, self._current) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        self.next_run_at = None
+        logger.info("Processing scheduler stopped")
+
+    def trigger(self, reason: str = "manual") -> asyncio.Task:
+        """Start a run, or return the one already in progress."""
+        if self.running:
+            logger.info(f"Processing already running, {reason} trigger joins it")
+            return self._current
+        self._current = asyncio.create_task(self._run(reason))
+        return self._current
+
+    def pause(self) -> None:
+        self.paused = True
+        self.next_run_at = None
+        self.reschedule()
+
+    def resume(self) -> None:
+        self.paused = False
+        interval = self.interval()
+        self.next_run_at = datetime.now() + timedelta(seconds=interval) if interval > 0 else None
+        self.reschedule()
+
+    def reschedule(self) -> None:
+        """Recompute the next run after the interval setting changed; the countdown keeps its start."""
+        self._wake.set()
+
+    async def _run(self, reason: str) -> None:
+        started = time.perf_counter()
+        self._current_run = {'trigger': reason, 'started_at': datetime.now().isoformat()}
+        event_bus.publish('run', {'status': 'started', **self._current_run})
+        error = None
+        result = None
+        try:
+            result = await self.job()
+        except asyncio.CancelledError:
+            error = "cancelled"
+            raise
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Processing run failed: {error}")
+        finally:
+            self.runs += 1
+            self.last_run = {
+                **self._current_run,
+                'finished_at': datetime.now().isoformat(),
+                'duration': round(time.perf_counter() - started, 3),
+                'error': error,
+                'result': result
+            }
+            self._current_run = None
+            event_bus.publish('run', {'status': 'failed' if error else 'finished', **self.last_run})
+
+    async def _schedule_loop(self) -> None:
+        # the countdown to the next run starts here, after every run and when scheduling is re-enabled;
+        # wake-ups only recompute the deadline from it, so unrelated setting saves don't delay runs
+        counting_from = datetime.now()
+        while True:
+            self._wake.clear()
+            interval = self.interval()
+            if self.paused or interval <= 0:
+                self.next_run_at = None
+                await self._wake.wait()
+                counting_from = datetime.now()
+                continue
+
+            self.next_run_at = counting_from + timedelta(seconds=interval)
+            delay = (self.next_run_at - datetime.now()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    continue  # woken early: the interval or pause state changed
+                except asyncio.TimeoutError:
+                    pass
+
+            self.next_run_at = None
+            # the next interval counts from the end of this run
+            await asyncio.shield(self.trigger("scheduled"))
+            counting_from = datetime.now()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'paused': self.paused,
+            'interval': self.interval(),
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'current_run': self._current_run,
+            'last_run': self.last_run,
+            'runs': self.runs
+        }
@@ -1,13 +1,351 @@
-from config import SUMMARIZER_MODEL
+import asyncio
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Dict, List, Optional
+from loguru import logger
+import litellm
+from config import (
+    SUMMARIZER_MODEL,
+    SUMMARIZER_API_BASE,
+    SUMMARY_CACHE_MAX_AGE_DAYS,
+    SUMMARY_CACHE_MAX_BYTES,
+    SUMMARIZER_CONTEXT_TOKENS,
+    SUMMARY_OUTPUT_TOKENS,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAP_CONCURRENCY,
+    SUMMARY_SHORT_TOKENS,
+    SUMMARY_BATCH_MAX_ITEMS,
+    SUMMARY_BATCH_MAX_TOKENS,
+    SUMMARY_BATCH_WAIT
+)
 from litellm import acompletion
+from rate_limit import get_limiter, llm_provider
+from metrics import CACHE_REQUESTS
 
-async def summarize_text(text):
-    """Generate a summary of the given text using LiteLLM."""
-    response = await acompletion(
-        model="openrouter/google/gemini-flash-1.5",
-        messages=[
-            {'role': 'system', 'content': 'You are a helpful assistant who summarizes news articles. You output a concise yet comprehensive summary of the given article(s), with no added comments.'},
-            {'role': 'user', 'content': text},
-        ]
-    )
-    return response.choices[0].message.content
\ No newline at end of file
+SYSTEM_PROMPT = 'You are a helpful assistant who summarizes news articles. You output a concise yet comprehensive summary of the given article(s), with no added comments.'
+
+CHUNK_PROMPT = 'You are a helpful assistant who summarizes news articles. You are given one part of a longer article; output a concise summary of that part only, with no added comments.'
+
+REDUCE_PROMPT = 'You are a helpful assistant who summarizes news articles. You are given summaries of consecutive parts of one article; combine them into a concise yet comprehensive summary of the whole article, with no added comments.'
+
+BATCH_PROMPT = (
+    'You are a helpful assistant who summarizes news articles. You are given a JSON object with a list of '
+    'articles, each with an "id" and a "text". Summarize every article separately, concisely yet comprehensively, '
+    'with no added comments. Respond with only a JSON object of the form '
+    '{"summaries": [{"id": "<article id>", "summary": "<summary>"}]}, with one entry per article.'
+)
+
+# bump whenever a prompt changes so cached summaries from the old prompts are not reused
+PROMPT_VERSION = "2"
+
+def normalize_text(text):
+    """Normalize article text so trivially different copies hash the same."""
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r'\s+', ' ', text).strip()
+
+def summary_cache_key(text, model, prompt_version=PROMPT_VERSION, mode="single"):
+    """Content address of a summary: hash of normalized text, model, prompt version and summarization mode.
+
+    The mode (single, batch or map_reduce) picks the prompts used, so each one is cached separately.
+    """
+    payload = f"{model}\0{prompt_version}\0{mode}\0{normalize_text(text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """Persistent summary cache stored in the summary_cache table, read through an AsyncDatabase."""
+
+    def __init__(self, db):
+        self.db = db
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, text, model, mode="single"):
+        summary = await self.db.get_cached_summary(summary_cache_key(text, model, mode=mode))
+        if summary is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels('summary', 'miss').inc()
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.labels('summary', 'hit').inc()
+        return summary
+
+    async def put(self, text, model, summary, mode="single"):
+        await self.db.save_cached_summary(summary_cache_key(text, model, mode=mode), model, PROMPT_VERSION, summary)
+
+    async def evict(self, max_age_days=SUMMARY_CACHE_MAX_AGE_DAYS, max_bytes=SUMMARY_CACHE_MAX_BYTES):
+        removed = await self.db.evict_summary_cache(max_age_days=max_age_days, max_bytes=max_bytes)
+        if removed:
+            logger.info(f"Evicted {removed} entries from the summary cache")
+        return removed
+
+    async def stats(self):
+        lookups = self.hits + self.misses
+        size = await self.db.get_summary_cache_size()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'prompt_version': PROMPT_VERSION,
+            **size
+        }
+
+def count_tokens(text, model=SUMMARIZER_MODEL):
+    """Count tokens with the model's tokenizer, or estimate them if litellm cannot."""
+    try:
+        return litellm.token_counter(model=model, text=text)
+    except Exception:
+        return len(text) // 4 + 1
+
+def context_window(model=SUMMARIZER_MODEL):
+    """Input token limit of the model, falling back to SUMMARIZER_CONTEXT_TOKENS for unknown models."""
+    try:
+        info = litellm.get_model_info(model)
+        return info.get('max_input_tokens') or info.get('max_tokens') or SUMMARIZER_CONTEXT_TOKENS
+    except Exception:
+        return SUMMARIZER_CONTEXT_TOKENS
+
+def split_into_chunks(text, max_tokens, model=SUMMARIZER_MODEL):
+    """Split text into chunks of at most max_tokens, breaking at paragraphs, then sentences, then words."""
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph, model) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            if count_tokens(sentence, model) <= max_tokens:
+                pieces.append(sentence)
+                continue
+            words = sentence.split()
+            # words are rarely more than a couple of tokens; keep a margin
+            step = max(1, max_tokens // 2)
+            pieces.extend(' '.join(words[i:i + step]) for i in range(0, len(words), step))
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece, model)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+def truncate_to_tokens(text, max_tokens, model=SUMMARIZER_MODEL):
+    """The start of text, at most max_tokens long, cut at a paragraph, sentence or word boundary."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    chunks = split_into_chunks(text, max_tokens, model)
+    return chunks[0] if chunks else text
+
+def parse_batch_response(content):
+    """Read {"summaries": [{"id", "summary"}]} from a batch response, tolerating code fences around it."""
+    start, end = content.find('{'), content.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in batch response")
+    data = json.loads(content[start:end + 1])
+    return {
+        str(entry['id']): entry['summary']
+        for entry in data.get('summaries', [])
+        if isinstance(entry, dict) and entry.get('id') is not None and entry.get('summary')
+    }
+
+class SummarizationEngine:
+    """Token-aware summarizer.
+
+    Articles are routed by their token count for the model:
+
+    * long ones are split into chunks that are summarized in parallel and
+      then reduced (in parallel rounds if the parts are still too long);
+    * short ones wait up to SUMMARY_BATCH_WAIT seconds for company and are
+      sent several to a request, with the summaries split back out by id.
+      Anything a batch response is missing is summarized on its own;
+    * everything else gets a single request, as before.
+
+    Counters of requests made and of requests and prompt tokens saved by
+    batching are available from `stats()`.
+    """
+
+    def __init__(self, cache: Optional[SummaryCache] = None):
+        self.cache = cache
+        self._map_semaphore = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+        self._pending: Dict[str, list] = {}
+        self._pending_tokens: Dict[str, int] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks = set()
+        self.counters = {
+            'requests': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'single': 0,
+            'chunked_articles': 0,
+            'chunks': 0,
+            'truncated_reduces': 0,
+            'batches': 0,
+            'batched_articles': 0,
+            'batch_fallbacks': 0,
+            'requests_saved': 0,
+            'prompt_tokens_saved': 0
+        }
+
+    def chunk_limit(self, model):
+        """Largest article, in tokens, that still goes out as one request."""
+        room = context_window(model) - count_tokens(SYSTEM_PROMPT, model) - SUMMARY_OUTPUT_TOKENS
+        return max(256, min(SUMMARY_CHUNK_TOKENS, room))
+
+    async def _complete(self, model, system_prompt, content):
+        self.counters['requests'] += 1
+        response = await get_limiter(llm_provider(model)).call(
+            lambda: acompletion(
+                model=model,
+                messages=[
+                    {'role': 'system', 'content': system_prompt},
+                    {'role': 'user', 'content': content},
+                ],
+                api_base=SUMMARIZER_API_BASE
+            ),
+            chars=len(system_prompt) + len(content)
+        )
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            self.counters['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+            self.counters['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+        return response.choices[0].message.content
+
+    async def summarize(self, text, model=SUMMARIZER_MODEL, key=None):
+        """Summarize one article; `key` (e.g. its url) only labels it in logs."""
+        tokens = count_tokens(text, model)
+        limit = self.chunk_limit(model)
+        if tokens > limit:
+            mode = 'map_reduce'
+        elif tokens <= SUMMARY_SHORT_TOKENS and SUMMARY_BATCH_MAX_ITEMS > 1:
+            mode = 'batch'
+        else:
+            mode = 'single'
+
+        if self.cache is not None:
+            cached = await self.cache.get(text, model, mode)
+            if cached is not None:
+                return cached
+
+        if mode == 'map_reduce':
+            summary = await self._map_reduce(text, model, limit, key)
+        elif mode == 'batch':
+            summary = await self._batched(text, model, tokens)
+        else:
+            self.counters['single'] += 1
+            summary = await self._complete(model, SYSTEM_PROMPT, text)
+
+        if self.cache is not None:
+            await self.cache.put(text, model, summary, mode)
+        return summary
+
+    async def _map_reduce(self, text, model, limit, key=None):
+        chunks = split_into_chunks(text, limit, model)
+        self.counters['chunked_articles'] += 1
+        self.counters['chunks'] += len(chunks)
+        logger.info(f"Summarizing {key or 'article'} in {len(chunks)} chunks")
+
+        async def summarize_part(system_prompt, content):
+            async with self._map_semaphore:
+                return await self._complete(model, system_prompt, content)
+
+        partials = await asyncio.gather(*(summarize_part(CHUNK_PROMPT, chunk) for chunk in chunks))
+
+        # reduce in rounds until all partial summaries fit into one request
+        while len(partials) > 1 and count_tokens('\n\n'.join(partials), model) > limit:
+            groups, current, current_tokens = [], [], 0
+            for partial in partials:
+                tokens = count_tokens(partial, model)
+                if current and current_tokens + tokens > limit:
+                    groups.append(current)
+                    current, current_tokens = [], 0
+                current.append(partial)
+                current_tokens += tokens
+            groups.append(current)
+            if len(groups) == len(partials):
+                break  # every partial fills a request on its own; reducing further cannot shrink them
+            partials = await asyncio.gather(*(
+                summarize_part(REDUCE_PROMPT, '\n\n'.join(group)) if len(group) > 1 else asyncio.sleep(0, group[0])
+                for group in groups
+            ))
+
+        if len(partials) > 1 and count_tokens('\n\n'.join(partials), model) > limit:
+            # the rounds stopped shrinking them; keep the start of each so the last request still fits
+            self.counters['truncated_reduces'] += 1
+            share = max(1, limit // len(partials) - 2)  # two tokens for the separator
+            logger.warning(f"Truncating {len(partials)} partial summaries of {key or 'article'} to {share} tokens each")
+            partials = [truncate_to_tokens(partial, share, model) for partial in partials]
+
+        return await self._complete(model, REDUCE_PROMPT, '\n\n'.join(partials))
+
+    async def _batched(self, text, model, tokens):
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(model, [])
+        pending.append((text, tokens, future))
+        self._pending_tokens[model] = self._pending_tokens.get(model, 0) + tokens
+
+        if len(pending) >= SUMMARY_BATCH_MAX_ITEMS or self._pending_tokens[model] >= SUMMARY_BATCH_MAX_TOKENS:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = asyncio.get_running_loop().call_later(SUMMARY_BATCH_WAIT, self._flush, model)
+        return await future
+
+    def _flush(self, model):
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(model, [])
+        self._pending_tokens.pop(model, None)
+        if batch:
+            task = asyncio.create_task(self._run_batch(model, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, model, batch):
+        if len(batch) == 1:
+            await self._run_single(model, *batch[0])
+            return
+
+        ids = [str(i) for i in range(1, len(batch) + 1)]
+        content = json.dumps({'articles': [{'id': id_, 'text': text} for id_, (text, _, _) in zip(ids, batch)]})
+        summaries = {}
+        try:
+            summaries = parse_batch_response(await self._complete(model, BATCH_PROMPT, content))
+        except Exception as e:
+            logger.warning(f"Batched summary request for {len(batch)} articles failed, summarizing them one by one: {str(e)}")
+
+        self.counters['batches'] += 1
+        self.counters['batched_articles'] += len(batch)
+        answered = [(id_, entry) for id_, entry in zip(ids, batch) if id_ in summaries]
+        if answered:
+            self.counters['requests_saved'] += len(answered) - 1
+            separate = sum(count_tokens(SYSTEM_PROMPT, model) + tokens for _, (_, tokens, _) in answered)
+            self.counters['prompt_tokens_saved'] += separate - count_tokens(BATCH_PROMPT + content, model)
+        for id_, (_, _, future) in answered:
+            if not future.done():
+                future.set_result(summaries[id_])
+
+        missing = [entry for id_, entry in zip(ids, batch) if id_ not in summaries]
+        self.counters['batch_fallbacks'] += len(missing)
+        await asyncio.gather(*(self._run_single(model, *entry) for entry in missing))
+
+    async def _run_single(self, model, text, tokens, future):
+        self.counters['single'] += 1
+        try:
+            summary = await self._complete(model, SYSTEM_PROMPT, text)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(summary)
+
+    def stats(self):
+        return dict(self.counters)
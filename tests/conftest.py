@@ -0,0 +1,11 @@
+import os
+import sys
+
+# the modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config reads these on import; the tests never reach the providers
+for key in ('ELEVEN_API_KEY', 'NEETS_API_KEY', 'OPENROUTER_API_KEY'):
+    os.environ.setdefault(key, "test")
+# offline: use litellm's bundled model list instead of downloading it
+os.environ.setdefault('LITELLM_LOCAL_MODEL_COST_MAP', "True")
@@ -0,0 +1,61 @@
+import asyncio
+import importlib.util
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+API_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api", "main.py")
+
+# how long the blocking database call holds its thread
+BLOCK_SECONDS = 1.0
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    """The API module, loaded in a scratch directory with its own database."""
+    workdir = tmp_path_factory.mktemp("api")
+    (workdir / "output").mkdir()
+    with pytest.MonkeyPatch.context() as patch:
+        # the database and output folder are relative to the working directory
+        patch.chdir(workdir)
+        spec = importlib.util.spec_from_file_location("narrate_api", API_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        seed(module.db.sync, 50)
+        yield module
+        module.db.close()
+
+def seed(db, rows):
+    now = datetime.now(timezone.utc)
+    articles = [{
+        'url': f"https://example.com/news/{i}",
+        'title': f"Article {i}",
+        'content': f"Content of article {i}.",
+        'publish_date': (now - timedelta(minutes=i)).isoformat()
+    } for i in range(rows)]
+    db.save_articles(articles)
+    db.save_summaries({article['url']: {'summary': f"Summary {i}", 'audio_path': f"/audio/{i}.mp3"}
+                       for i, article in enumerate(articles)})
+
+@pytest.mark.parametrize("path", ["/summaries", "/summaries?limit=10", "/summaries?fields=url,summary"])
+def test_summaries_served_while_a_database_call_blocks(api, path):
+    async def scenario():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # holds one database thread the way a slow write or a full rebuild would
+            blocker = asyncio.ensure_future(api.db.run(time.sleep, BLOCK_SECONDS))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(client.get(path) for _ in range(20)))
+            elapsed = time.perf_counter() - started
+            still_blocked = not blocker.done()
+            await blocker
+        return responses, elapsed, still_blocked
+
+    responses, elapsed, still_blocked = asyncio.run(scenario())
+    assert all(response.status_code == 200 for response in responses)
+    # had the call run on the event loop, no request could finish before it returned
+    assert still_blocked
+    assert elapsed < BLOCK_SECONDS / 2
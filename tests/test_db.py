@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+import pytest
+
+from db import Database
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+def query_plan(db, sql, params):
+    with db.get_db() as conn:
+        return [row['detail'] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+def uses_date_index(plan):
+    return any("idx_articles_date" in step for step in plan)
+
+def test_date_range_query_uses_date_index(db):
+    sql, params = db.articles_query(date_from=datetime(2024, 1, 1), date_to=datetime(2024, 1, 2))
+    assert uses_date_index(query_plan(db, sql, params))
+
+def test_day_query_uses_date_index(db):
+    sql, params = db.articles_query(filter_date=date(2024, 1, 1))
+    assert uses_date_index(query_plan(db, sql, params))
+
+@pytest.mark.parametrize("join_summaries", [False, True])
+def test_first_page_query_uses_date_index(db, join_summaries):
+    sql, params = db.page_query(['url', 'title'], join_summaries, 20, None)
+    assert uses_date_index(query_plan(db, sql, params))
+
+@pytest.mark.parametrize("join_summaries", [False, True])
+def test_next_page_query_uses_date_index(db, join_summaries):
+    cursor = db.encode_cursor("2024-01-01 00:00:00", "https://example.com/a")
+    sql, params = db.page_query(['url', 'title'], join_summaries, 20, cursor)
+    assert uses_date_index(query_plan(db, sql, params))
@@ -1,8 +1,16 @@
 import os
+import re
 import json
+import shutil
+import asyncio
+import tempfile
 from loguru import logger
 import aiohttp
-from config import ELEVEN_API_KEY, ELEVENLABS_VOICE_ID, NEETS_API_KEY, DEFAULT_TTS_PROVIDER, DEFAULT_NEETS_MODEL, DEFAULT_NEETS_VOICE
+from http_client import get_http_client
+from mp3 import concat_files
+from rate_limit import get_limiter
+from metrics import CACHE_REQUESTS
+from config import ELEVEN_API_KEY, ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL, NEETS_API_KEY, DEFAULT_TTS_PROVIDER, DEFAULT_NEETS_MODEL, DEFAULT_NEETS_VOICE, AUDIO_TMP_FOLDER, AUDIO_CHUNK_SIZE, TTS_CHUNK_CHARS, ELEVENLABS_API_BASE, NEETS_API_BASE
 
 if not ELEVEN_API_KEY:
     logger.error("Missing required ELEVEN_API_KEY. Please check your .env file.")
@@ -12,34 +20,36 @@ if not NEETS_API_KEY:
     logger.error("Missing required NEETS_API_KEY. Please check your .env file.")
     raise ValueError("Missing required NEETS_API_KEY")
 
-# fetch available voices from elevenlabs
-async def fetch_elevenlabs_voices():
-    url = "https://api.elevenlabs.io/v1/voices"
+# fetch available voices from elevenlabs (failures return [] unless raise_errors)
+async def fetch_elevenlabs_voices(raise_errors=False):
+    url = f"{ELEVENLABS_API_BASE}/voices"
     headers = {"xi-api-key": ELEVEN_API_KEY}
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                voices = await response.json()
-                return [(voice["voice_id"], voice["name"]) for voice in voices["voices"]]
+        async with get_http_client().get(url, headers=headers) as response:
+            response.raise_for_status()
+            voices = await response.json()
+            return [(voice["voice_id"], voice["name"]) for voice in voices["voices"]]
     except (aiohttp.ClientError, KeyError) as e:
         logger.error(f"Failed to fetch ElevenLabs voices: {e}")
+        if raise_errors:
+            raise
         return []
 
-# fetch available voices from neets
-async def fetch_neets_voices():
-    url = "https://api.neets.ai/v1/voices"
+# fetch available voices from neets (failures return [] unless raise_errors)
+async def fetch_neets_voices(raise_errors=False):
+    url = f"{NEETS_API_BASE}/voices"
     headers = {"accept": "application/json", "X-API-Key": NEETS_API_KEY}
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                voices = await response.json()
-                return [(voice["id"], voice["title"], ", ".join(voice["supported_models"])) for voice in voices]
+        async with get_http_client().get(url, headers=headers) as response:
+            response.raise_for_status()
+            voices = await response.json()
+            return [(voice["id"], voice["title"], ", ".join(voice["supported_models"])) for voice in voices]
     except (aiohttp.ClientError, KeyError) as e:
         logger.error(f"Failed to fetch Neets voices: {e}")
+        if raise_errors:
+            raise
         return []
 
 # prompt user to select tts provider
@@ -89,9 +99,52 @@ def select_neets_model():
         except ValueError:
             print("Please enter a valid number or press ENTER for default.")
 
+# stream a response body to disk without holding it in memory or blocking the event loop
+async def stream_to_file(response, output_file_path):
+    # write into a folder outside the /audio mount, then atomically rename into place,
+    # so a partially written file is never served
+    os.makedirs(AUDIO_TMP_FOLDER, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=AUDIO_TMP_FOLDER)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            async for chunk in response.content.iter_chunked(AUDIO_CHUNK_SIZE):
+                await loop.run_in_executor(None, f.write, chunk)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return output_file_path
+
+# split text at sentence boundaries into chunks of at most max_chars
+def split_text(text, max_chars):
+    chunks, current = [], ""
+    for sentence in re.split(r'(?<=[.!?…])\s+', text.strip()):
+        # a sentence longer than a chunk is broken at word boundaries
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk]
+
 # convert text to audio using elevenlabs api
-async def convert_to_audio_elevenlabs(text, output_file_path, voice_id):
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+async def convert_to_audio_elevenlabs(text, output_file_path, voice_id, previous_text=None, next_text=None):
+    # streaming endpoint: audio starts arriving before the whole clip is synthesized
+    url = f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}/stream"
     headers = {
         "Accept": "audio/mpeg",
         "Content-Type": "application/json",
@@ -99,30 +152,32 @@ async def convert_to_audio_elevenlabs(text, output_file_path, voice_id):
     }
     data = {
         "text": text,
-        "model_id": "eleven_multilingual_v2",
+        "model_id": ELEVENLABS_MODEL,
         "voice_settings": {
             "stability": 0.5,
             "similarity_boost": 0.5
         }
     }
+    # neighbouring chunks keep the intonation continuous across segment boundaries
+    if previous_text:
+        data["previous_text"] = previous_text
+    if next_text:
+        data["next_text"] = next_text
 
     encoded_data = json.dumps(data).encode('utf-8')
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=encoded_data, headers=headers) as response:
-                response.raise_for_status()
-                content = await response.read()
-                with open(output_file_path, 'wb') as f:
-                    f.write(content)
-                logger.info(f"Audio saved to {output_file_path}")
-                return output_file_path
+        async with get_http_client().post(url, data=encoded_data, headers=headers) as response:
+            response.raise_for_status()
+            await stream_to_file(response, output_file_path)
+            logger.info(f"Audio saved to {output_file_path}")
+            return output_file_path
     except (aiohttp.ClientError, IOError) as e:
         logger.error(f"Error in convert_to_audio_elevenlabs: {e}")
         raise
 
 # convert text to audio using neets api
 async def convert_to_audio_neets(text, output_file_path, model, voice_id):
-    url = "https://api.neets.ai/v1/tts"
+    url = f"{NEETS_API_BASE}/tts"
     headers = {
         "accept": "audio/wav",
         "content-type": "application/json",
@@ -136,21 +191,80 @@ async def convert_to_audio_neets(text, output_file_path, model, voice_id):
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, headers=headers) as response:
-                response.raise_for_status()
-                content = await response.read()
-                with open(output_file_path, 'wb') as f:
-                    f.write(content)
-                logger.info(f"Audio saved to {output_file_path}")
-                return output_file_path
+        async with get_http_client().post(url, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            await stream_to_file(response, output_file_path)
+            logger.info(f"Audio saved to {output_file_path}")
+            return output_file_path
     except (aiohttp.ClientError, IOError) as e:
         logger.error(f"Error in convert_to_audio_neets: {e}")
         raise
 
+# synthesize one chunk into output_file_path, within the provider's rate limits
+async def synthesize(text, output_file_path, provider, voice_id, model=None, previous_text=None, next_text=None):
+    async def request():
+        if provider == "elevenlabs":
+            return await convert_to_audio_elevenlabs(text, output_file_path, voice_id, previous_text, next_text)
+        else:  # neets
+            return await convert_to_audio_neets(text, output_file_path, model, voice_id)
+
+    return await get_limiter(provider).call(request, chars=len(text))
+
 # main function to convert text to audio
-async def convert_to_audio(text, output_file_path, provider, voice_id, model=None):
-    if provider == "elevenlabs":
-        return await convert_to_audio_elevenlabs(text, output_file_path, voice_id)
-    else:  # neets
-        return await convert_to_audio_neets(text, output_file_path, model, voice_id)
\ No newline at end of file
+async def convert_to_audio(text, output_file_path, provider, voice_id, model=None, on_first_segment=None):
+    """Narrate `text` into output_file_path.
+
+    Long text is split at sentence boundaries into provider-sized chunks that
+    are synthesized concurrently and joined frame by frame. Finished segments
+    are kept until the join, so a retry only synthesizes the missing ones.
+    When there is more than one segment, `on_first_segment(path)` is awaited
+    with the first one as soon as it is ready, so playback can start early;
+    if it raises, the error is logged and the narration carries on.
+    """
+    # audio files are content addressed, an existing file already holds this narration
+    if os.path.exists(output_file_path) and os.path.getsize(output_file_path) > 0:
+        logger.info(f"Reusing existing audio {output_file_path}")
+        CACHE_REQUESTS.labels('audio', 'hit').inc()
+        return output_file_path
+    CACHE_REQUESTS.labels('audio', 'miss').inc()
+
+    chunks = split_text(text, TTS_CHUNK_CHARS.get(provider, 1000))
+    if len(chunks) <= 1:
+        return await synthesize(text, output_file_path, provider, voice_id, model)
+
+    # segments live outside the /audio mount, in a folder named after the final file
+    segment_dir = os.path.join(AUDIO_TMP_FOLDER, os.path.splitext(os.path.basename(output_file_path))[0])
+    os.makedirs(segment_dir, exist_ok=True)
+    segment_paths = [os.path.join(segment_dir, f"{i:04d}.mp3") for i in range(len(chunks))]
+
+    async def synthesize_segment(i):
+        if os.path.exists(segment_paths[i]) and os.path.getsize(segment_paths[i]) > 0:
+            return segment_paths[i]
+        return await synthesize(
+            chunks[i], segment_paths[i], provider, voice_id, model,
+            previous_text=chunks[i - 1] if i > 0 else None,
+            next_text=chunks[i + 1] if i + 1 < len(chunks) else None
+        )
+
+    logger.info(f"Synthesizing {len(chunks)} segments for {output_file_path}")
+    tasks = [asyncio.create_task(synthesize_segment(i)) for i in range(len(chunks))]
+    try:
+        if on_first_segment is not None:
+            first_segment = await tasks[0]
+            try:
+                await on_first_segment(first_segment)
+            except Exception as e:
+                # the preview is a nicety; the full narration still gets finished and saved
+                logger.warning(f"Publishing the first segment of {output_file_path} failed: {str(e)}")
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, concat_files, segment_paths, output_file_path, AUDIO_TMP_FOLDER)
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    logger.info(f"Audio saved to {output_file_path}")
+    return output_file_path
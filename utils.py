@@ -1,5 +1,5 @@
 import os
-from datetime import datetime
+from datetime import datetime, time, timedelta, timezone
 import re
 import logging
 
@@ -17,16 +17,19 @@ def sanitize_filename(filename):
     # limit filename length: 200 characters
     return filename[:200]
 
-def filter_articles_by_date(articles, target_date):
-    """Filter articles by a specific date."""
-    if not articles:
-        return {}
-    
-    filtered = {}
-    for url, article in articles.items():
-        if article.get('publish_date'):
-            article_date = datetime.fromisoformat(article['publish_date']).date()
-            if article_date == target_date:
-                filtered[url] = article
-    
-    return filtered
\ No newline at end of file
+def to_utc(value, tz=timezone.utc):
+    """Convert a datetime to naive UTC, the form publish dates are stored in.
+
+    Naive values are taken to be in `tz`.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=tz)
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def day_range(day, tz=timezone.utc):
+    """Half-open naive UTC range [start, end) covering calendar day `day` in timezone `tz`."""
+    start = datetime.combine(day, time.min)
+    return to_utc(start, tz), to_utc(start + timedelta(days=1), tz)
+
+def local_timezone():
+    return datetime.now().astimezone().tzinfo